@@ -9,6 +9,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "src"
 from src.agents.bio_rag_agent import BioRAGAgent
 from config import (
     CHROMA_DB_PATH,
+    CHROMA_BUILD_MARKER,
     DATA_PATH,
     CONTEXT_MODE,
     OLLAMA_LLM_MODEL,
@@ -17,7 +18,8 @@ from config import (
 
 # Helper to check if knowledge base exists
 def ensure_knowledge_base_exists_ui():
-    if not os.path.exists(CHROMA_DB_PATH) or not os.listdir(CHROMA_DB_PATH):
+    # The build writes the marker file last, so it only exists for a complete database
+    if not os.path.isfile(CHROMA_BUILD_MARKER):
         st.error(
             f"Knowledge Base (ChromaDB) not found or is empty at `{CHROMA_DB_PATH}`!"
             "\nPlease build it first by running: `python3 -m src.knowledge_base.build_knowledge_base`"
@@ -33,6 +35,8 @@ def initialize_agent():
     ensure_knowledge_base_exists_ui()
     st.info("Initializing Bioinformatics-AI Assistant. This might take a moment...")
     try:
+        # Creating the agent warms up the LLM and embedding model, so the models are
+        # already loaded into memory when the first question is asked
         agent = BioRAGAgent()
         st.success("Bioinformatics-AI Assistant Initialized!")
         return agent
@@ -59,6 +63,8 @@ st.sidebar.write(f"**LLM Model:** `{OLLAMA_LLM_MODEL}`")
 st.sidebar.write(f"**Context Mode:** `{CONTEXT_MODE}`")
 st.sidebar.write(f"**Knowledge Base Path:** `{CHROMA_DB_PATH}`")
 st.sidebar.write(f"**Data Directory:** `{DATA_PATH}`")
+# Filled once a question has been answered
+prompt_tokens_metric = st.sidebar.empty()
 
 
 # Initialize agent (this will run only once thanks to @st.cache_resource)
@@ -81,15 +87,20 @@ if prompt := st.chat_input("Ask the Bioinformatics Assistant for help"):
     # Add user message to chat history
     st.session_state.messages.append({"role": "user", "content": prompt})
 
-    with st.spinner("Assistant thinking..."):
-        # Get response from the RAG agent
-        response = agent.query_agent(prompt)
-
-        # Display assistant response in chat message container
-        with st.chat_message("assistant"):
-            st.markdown(response)
-        # Add assistant response to chat history
-        st.session_state.messages.append({"role": "assistant", "content": response})
+    # Display assistant response in chat message container while it is generated
+    # The agent is shared by all sessions, so the token count is kept per session
+    usage = {}
+    with st.chat_message("assistant"):
+        response = st.write_stream(agent.query_agent_stream(prompt, usage=usage))
+    # Add assistant response to chat history
+    st.session_state.messages.append({"role": "assistant", "content": response})
+    # The prompt is built when the stream starts, so the count is set by now
+    st.session_state.prompt_tokens = usage["prompt_tokens"]
+
+if "prompt_tokens" in st.session_state:
+    prompt_tokens_metric.metric(
+        "Prompt tokens (estimated)", st.session_state.prompt_tokens
+    )
 
 st.sidebar.markdown("---")
 st.sidebar.markdown("Made by Sebastian Pirmann")
@@ -4,11 +4,66 @@ import os
 DATA_PATH = os.path.join(os.path.dirname(__file__), "data")
 
 # Name of the LLM model, used by Ollama (e.g. "mistral", "llama3")
-OLLAMA_LLM_MODEL = "gemma:2b"  #
+# Ollama's default tags (e.g. "gemma:2b") are already 4-bit Q4_0; Q4_K_M is about the same
+# size and speed with slightly better quality. FP16 tags (e.g. "gemma:2b-instruct-fp16")
+# need about four times the memory and decode much slower, as decoding is memory bound
+OLLAMA_LLM_MODEL = "gemma:2b-instruct-q4_K_M"
+
+# Context window of the LLM (in tokens), must fit the prompt, the retrieved chunks and the answer
+OLLAMA_NUM_CTX = 4096
+
+# Number of prompt tokens the LLM processes per step during prefill
+OLLAMA_NUM_BATCH = 512
+
+# Number of model layers offloaded to the GPU (None lets Ollama decide, 0 runs on CPU only)
+OLLAMA_NUM_GPU = None
+
+# Number of CPU threads Ollama uses for the models (None lets Ollama decide, it uses the
+# physical cores; os.cpu_count() counts hyperthreads and, in containers, the host's CPUs)
+OLLAMA_NUM_THREAD = None
+
+# How long Ollama keeps the models loaded after a request (-1 keeps them loaded until Ollama stops)
+# Keeping the models resident avoids reloading them from disk on the first query after a pause
+OLLAMA_KEEP_ALIVE = -1
 
 # Name of the Embedding model used by Llama ("nomic-embed-text")
 OLLAMA_EMBEDDING_MODEL = "nomic-embed-text"
 
+# Number of query embeddings kept in memory, so repeated questions skip the embedding request
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+
+# Number of concurrent embedding requests sent to Ollama while building the knowledge base
+# Speedup stops at the server's parallel request limit, which is set when starting Ollama:
+#   OLLAMA_NUM_PARALLEL=8 ollama serve
+EMBEDDING_MAX_WORKERS = 8
+
+# Number of texts handed to the embedding workers at a time (also controls progress output)
+EMBEDDING_BATCH_SIZE = 64
+
+# Context window (in tokens) of the embedding model; chunks are short, so a small context saves memory
+EMBEDDING_NUM_CTX = 2048
+
+# Number of CPU threads Ollama uses for the embedding model (None lets Ollama decide)
+EMBEDDING_NUM_THREAD = OLLAMA_NUM_THREAD
+
+# Number of embedding model layers offloaded to the GPU (None lets Ollama decide)
+EMBEDDING_NUM_GPU = OLLAMA_NUM_GPU
+
+# Number of processes loading and parsing documents in parallel during the build
+# None uses one process per CPU, 1 loads all files in the main process
+LOADER_MAX_WORKERS = None
+
+# Number of new chunks embedded and stored at once during the build
+# Chunks are streamed from the documents, so only this many are held in memory
+BUILD_BATCH_SIZE = 256
+
+# Path to the cache of chunked documents, so unchanged files are not split again on rebuilds
+CHUNK_CACHE_PATH = os.path.join(os.path.dirname(__file__), ".chunk_cache")
+
+# Content hashes of the source files by size and modification time, used to skip duplicate
+# files and to look up cached chunks without reading unchanged files again
+INGEST_CACHE_PATH = os.path.join(CHUNK_CACHE_PATH, ".ingest_cache.json")
+
 # Path to ChromaDB database
 # Usually in subfolder '.chroma_db'
 CHROMA_DB_PATH = os.path.join(os.path.dirname(__file__), ".chroma_db")
@@ -17,9 +72,37 @@ CHROMA_DB_PATH = os.path.join(os.path.dirname(__file__), ".chroma_db")
 # If several knowledge bases are available, specify the selected one by name
 CHROMA_COLLECTION_NAME = "bio_knowledge_base"
 
+# Marker file written after a successful build, holding the collection name and chunk count
+# Checking this one file is cheaper than listing the database directory on every start
+CHROMA_BUILD_MARKER = os.path.join(CHROMA_DB_PATH, ".built")
+
+# Keep a float16 copy of all embeddings next to ChromaDB (which stores float32) and use it for
+# MMR computations: half the memory and disk reads, cosine similarity is robust to float16
+# Set to False to read float32 embeddings from ChromaDB instead
+USE_FLOAT16_EMBEDDINGS = True
+
+# Number of chunks written to ChromaDB per insert
+# Larger batches build faster but need more RAM; capped at Chroma's own maximum batch size
+CHROMA_BATCH_SIZE = 10000
+
 # Maximum number of chunks to be send as context to the LLM
 # More chunks can be more relevant but increase processing time and token usage
-MAX_CONTEXT_CHUNKS = 5
+# With the reranker picking the best chunks, 3 keeps the prefill short without losing quality
+MAX_CONTEXT_CHUNKS = 3
+
+# Upper bound for the estimated number of tokens in the context sent to the LLM
+# Chunks beyond this budget are truncated, as prefill time grows with the prompt length
+MAX_CONTEXT_TOKENS = 1024
+
+# Average number of characters per token, used to estimate token counts without a tokenizer
+CHARS_PER_TOKEN = 4
+
+# Cross-encoder model used to rerank the retrieved chunks (downloaded once from Hugging Face)
+# Set to None to disable reranking and use the embedding similarity order directly
+RERANKER_MODEL = "BAAI/bge-reranker-base"
+
+# Number of candidate chunks retrieved from ChromaDB before reranking down to MAX_CONTEXT_CHUNKS
+RERANKER_FETCH_K = 30
 
 # Size of the text chunks (in characters)
 # A big chunk keeps more context, a small one is more specific
@@ -29,6 +112,23 @@ CHUNK_SIZE = 1000
 # Makes sure important context is not lost at chunk boundaries
 CHUNK_OVERLAP = 200
 
+# Text splitter used to chunk documents
+# "recursive": LangChain's recursive character splitter, chunks follow paragraphs and sentences;
+#              Python, R and Markdown files are split at function, class and heading boundaries
+# "predictive": measures each document only once and ends chunks at the strongest separator
+#               in their second half; fastest with CHUNK_SIZE_UNIT = "tokens"
+# "memchunk": much faster Rust byte chunker (pip install memchunk), but CHUNK_SIZE is in bytes
+#             and CHUNK_OVERLAP is ignored
+TEXT_SPLITTER = "recursive"
+
+# Unit of CHUNK_SIZE and CHUNK_OVERLAP for the recursive and predictive splitters
+# "characters" or "tokens" (counted with tiktoken, pip install tiktoken; the encoding file is
+# downloaded once on first use). Retrieval quality depends on the number of tokens per chunk.
+CHUNK_SIZE_UNIT = "characters"
+
+# tiktoken encoding used to count tokens if CHUNK_SIZE_UNIT is "tokens"
+TOKENIZER_ENCODING = "cl100k_base"
+
 # Context Mode for RAG Agent
 # "strict": Answer based ONLY on provided context. If not found, state "I don't know".
 # "regular": Prioritize provided context, but if insufficient, use LLM's general knowledge.
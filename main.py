@@ -1,15 +1,15 @@
 import os
 import sys
 from src.agents.bio_rag_agent import BioRAGAgent
-from config import CHROMA_DB_PATH
+from config import CHROMA_BUILD_MARKER
 
 
 def ensure_knowledge_base_exists():
     """
-    Checks if the ChromaDB knowledge base directory exists and is not empty.
-    If not, prompts the user to build it.
+    Checks if the ChromaDB knowledge base has been built, using the marker file written
+    at the end of a successful build. If not, prompts the user to build it.
     """
-    if not os.path.exists(CHROMA_DB_PATH) or not os.listdir(CHROMA_DB_PATH):
+    if not os.path.isfile(CHROMA_BUILD_MARKER):
         print("\n-----------------------------------------------------")
         print("WARNING: Knowledge Base (ChromaDB) not found or is empty!")
         print("Please build it first by running:")
@@ -1,16 +1,59 @@
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough, RunnableLambda
+from langchain_core.prompt_values import PromptValue
 from langchain_core.output_parsers import StrOutputParser
 from src.core.llm_handler import LLMHandler
 from src.core.embedding_handler import EmbeddingHandler
+from src.core.reranker import Reranker
 from src.knowledge_base.vector_database import VectorDatabase
 from config import (
     OLLAMA_LLM_MODEL,
     OLLAMA_EMBEDDING_MODEL,
     CHROMA_DB_PATH,
     CONTEXT_MODE,
+    MAX_CONTEXT_CHUNKS,
+    MAX_CONTEXT_TOKENS,
+    CHARS_PER_TOKEN,
+    RERANKER_MODEL,
+    RERANKER_FETCH_K,
 )
-from typing import List
+from typing import Dict, Iterator, List, Optional
+import math
+
+# System prompts are fixed strings without per-question values: an identical prefix
+# on every request lets Ollama reuse the cached prefill of the system message
+SYSTEM_PROMPT_STRICT = """Answer the question based ONLY on the context provided with it.
+If the answer cannot be found in the context, truthfully state that you don't know.
+Provide your answer in a clear and concise manner, suitable for a bioinformatics context."""
+
+SYSTEM_PROMPT_REGULAR = """You are a helpful bioinformatics assistant. Answer the user's question precisely and accurately.
+
+**Priority 1: Context from Knowledge Base**
+ALWAYS and exclusively use the information from the 'Context' provided with the question, IF it is relevant and directly answers the question.
+
+**Priority 2: LLM's General Knowledge**
+If the 'Context' does NOT contain sufficient information to answer the question, THEN and only then, use your general bioinformatics knowledge to answer. Ensure the highest accuracy and do not invent any information.
+
+**Source Indication (Optional):**
+If you use information from your general knowledge because the context was insufficient, you may briefly indicate this (e.g., "Based on general knowledge...")."""
+
+# Everything that changes per question goes into the human message, after the system prefix
+RAG_HUMAN_TEMPLATE = """Context:
+{context}
+
+Question: {question}"""
+
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens of a text from its length.
+    Args:
+        text (str): The text to estimate.
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
 
 
 class BioRAGAgent:
@@ -37,100 +80,134 @@ class BioRAGAgent:
             embedding_handler.get_embedding_model()
         )  # Using the getter method
 
+        # Initialize the cross-encoder reranker, if enabled
+        reranker = Reranker(RERANKER_MODEL) if RERANKER_MODEL else None
+
         self.db_handler = VectorDatabase(
-            embeddings_model=embeddings_model, persist_directory=CHROMA_DB_PATH
+            embeddings_model=embeddings_model,
+            persist_directory=CHROMA_DB_PATH,
+            embedding_handler=embedding_handler,
+            reranker=reranker,
         )
-        self.retriever = self._initialize_retriever()
+        self._load_knowledge_base()
 
         # Define the RAG prompt template
-        self.rag_prompt_strict = ChatPromptTemplate.from_template(
-            """Answer the question based ONLY on the following context. 
-            If the answer cannot be found in the context, truthfully state that you don't know.
-            Provide your answer in a clear and concise manner, suitable for a bioinformatics context.
-
-            Context:
-            {context}
-
-            Question: {question}
-            """
+        # The system message never changes between questions, so Ollama can reuse its
+        # cached prefill; the per-question context and question follow in the human message
+        self.rag_prompt_strict = ChatPromptTemplate.from_messages(
+            [("system", SYSTEM_PROMPT_STRICT), ("human", RAG_HUMAN_TEMPLATE)]
         )
 
-        self.rag_prompt_regular = ChatPromptTemplate.from_template(
-            """You are a helpful bioinformatics assistant. Answer the user's question precisely and accurately.
-
-                **Priority 1: Context from Knowledge Base**
-                ALWAYS and exclusively use the information from the 'Context' below, IF it is relevant and directly answers the question.
-
-                **Priority 2: LLM's General Knowledge**
-                If the 'Context' below does NOT contain sufficient information to answer the question, THEN and only then, use your general bioinformatics knowledge to answer. Ensure the highest accuracy and do not invent any information.
-
-                **Source Indication (Optional):**
-                If you use information from your general knowledge because the context was insufficient, you may briefly indicate this (e.g., "Based on general knowledge...").
-
-                Context:
-                {context}
+        self.rag_prompt_regular = ChatPromptTemplate.from_messages(
+            [("system", SYSTEM_PROMPT_REGULAR), ("human", RAG_HUMAN_TEMPLATE)]
+        )
 
-                Question: {question}
-                """
+        self.rag_prompt = (
+            self.rag_prompt_strict
+            if self.context_mode.upper() == "STRICT"
+            else self.rag_prompt_regular
         )
 
         # Define the RAG chain
-        # The chain takes the question, retrieves context, formats it, and passes to LLM
-        self.rag_chain = (
-            {
-                "context": self.retriever | RunnableLambda(self._format_docs),
-                "question": RunnablePassthrough(),
-            }
-            | (
-                self.rag_prompt_strict
-                if self.context_mode == "STRICT"
-                else self.rag_prompt_regular
-            )
-            | self.llm
-            | StrOutputParser()
-        )
+        # The chain takes the prompt filled with question and context and passes it to the LLM
+        self.rag_chain = self.llm | StrOutputParser()
 
         print("BioRAGAgent initialized successfully.")
         print(f"Using LLM: {OLLAMA_LLM_MODEL}")
         print(f"Using Embedding Model: {OLLAMA_EMBEDDING_MODEL}")
+        print(f"Using Reranker: {RERANKER_MODEL or 'disabled'}")
         print(f"Knowledge Base path: {CHROMA_DB_PATH}")
 
-    def _initialize_retriever(self):
+    def _load_knowledge_base(self):
         """
-        Loads the ChromaDB and creates a retriever instance.
+        Loads the ChromaDB the questions are answered from.
         """
         # Initialize the database. It should load an existing one.
         db = self.db_handler.initialize_db()
-        if db:
-            return db.as_retriever()
-        else:
+        if db is None:
             raise ValueError(
                 f"Could not load vector database from {CHROMA_DB_PATH}. Please ensure it has been built using build_knowledge_base.py"
             )
 
+    def _prepare_prompt(
+        self, question: str, usage: Optional[Dict[str, int]] = None
+    ) -> PromptValue:
+        """
+        Retrieves the context for a question and fills the RAG prompt with it.
+        Args:
+            question (str): The user's question.
+            usage (Optional[Dict[str, int]]): If given, the estimated number of prompt
+                                              tokens is stored in it as "prompt_tokens".
+        Returns:
+            PromptValue: The prompt to send to the LLM.
+        """
+        docs = self.db_handler.similarity_search(
+            question, k=MAX_CONTEXT_CHUNKS, fetch_k=RERANKER_FETCH_K
+        )
+        prompt_value = self.rag_prompt.invoke(
+            {"context": self._format_docs(docs), "question": question}
+        )
+        # Returned per call: the agent is shared by all sessions of the app
+        if usage is not None:
+            usage["prompt_tokens"] = estimate_tokens(prompt_value.to_string())
+        return prompt_value
+
     def _format_docs(self, docs: List) -> str:
         """
         Formats the retrieved documents into a single string for the LLM context.
+        Documents are added in order until MAX_CONTEXT_TOKENS is reached; the document
+        crossing the budget is cut off and the remaining ones are dropped.
         Args:
             docs (List): A list of LangChain Document objects.
         Returns:
             str: A concatenated string of document contents.
         """
-        return "\n\n---\n\n".join(doc.page_content for doc in docs)
-
-    def query_agent(self, question: str) -> str:
+        max_chars = MAX_CONTEXT_TOKENS * CHARS_PER_TOKEN
+        parts = []
+        used_chars = 0
+        for doc in docs:
+            if parts:
+                used_chars += len(CONTEXT_SEPARATOR)
+            remaining_chars = max_chars - used_chars
+            if remaining_chars <= 0:
+                break
+            content = doc.page_content[:remaining_chars]
+            parts.append(content)
+            used_chars += len(content)
+        return CONTEXT_SEPARATOR.join(parts)
+
+    def query_agent(
+        self, question: str, usage: Optional[Dict[str, int]] = None
+    ) -> str:
         """
         Queries the RAG agent with a given question.
         Args:
             question (str): The user's question.
+            usage (Optional[Dict[str, int]]): If given, the estimated number of prompt
+                                              tokens is stored in it as "prompt_tokens".
         Returns:
             str: The answer generated by the LLM based on retrieved context.
         """
         # print(f"\n--- Querying agent with: '{question}' ---")
-        response = self.rag_chain.invoke(question)
+        response = self.rag_chain.invoke(self._prepare_prompt(question, usage))
         # print("--- Query Finished ---")
         return response
 
+    def query_agent_stream(
+        self, question: str, usage: Optional[Dict[str, int]] = None
+    ) -> Iterator[str]:
+        """
+        Queries the RAG agent and yields the answer piece by piece while the LLM generates it.
+        Args:
+            question (str): The user's question.
+            usage (Optional[Dict[str, int]]): If given, the estimated number of prompt
+                                              tokens is stored in it as "prompt_tokens"
+                                              before the first piece is yielded.
+        Yields:
+            str: The next piece of the answer.
+        """
+        yield from self.rag_chain.stream(self._prepare_prompt(question, usage))
+
 
 # Example usage for testing purposes
 if __name__ == "__main__":
@@ -1,7 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from langchain_community.embeddings import OllamaEmbeddings
 from langchain_core.embeddings import Embeddings
-from typing import List
-from config import OLLAMA_EMBEDDING_MODEL
+from typing import Any, Dict, List, Optional, Tuple, Union
+from config import (
+    OLLAMA_EMBEDDING_MODEL,
+    OLLAMA_KEEP_ALIVE,
+    QUERY_EMBEDDING_CACHE_SIZE,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_MAX_WORKERS,
+    EMBEDDING_NUM_CTX,
+    EMBEDDING_NUM_THREAD,
+    EMBEDDING_NUM_GPU,
+)
+
+
+class KeepAliveOllamaEmbeddings(OllamaEmbeddings):
+    """
+    OllamaEmbeddings client that also sends Ollama's keep_alive parameter,
+    which the LangChain client does not expose.
+    """
+
+    keep_alive: Optional[Union[int, str]] = None
+
+    @property
+    def _default_params(self) -> Dict[str, Any]:
+        return {**super()._default_params, "keep_alive": self.keep_alive}
+
+
+# Embedding clients by model name, looked up by the query embedding cache below
+_embedding_models: Dict[str, Embeddings] = {}
+
+
+@lru_cache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)
+def _cached_query_embedding(model_name: str, text: str) -> Tuple[float, ...]:
+    """
+    Embeds a query with the registered model of the given name and caches the result.
+    Errors are not cached, so a failed query is embedded again on the next call.
+    Args:
+        model_name (str): The name of a registered embedding model.
+        text (str): The query text to embed.
+    Returns:
+        Tuple[float, ...]: The embedding vector (a tuple, so cached values cannot be mutated).
+    """
+    return tuple(_embedding_models[model_name].embed_query(text))
 
 
 class EmbeddingHandler:
@@ -15,8 +57,32 @@ class EmbeddingHandler:
         Args:
             model_name (str): The name of the Ollama embedding model to use.
         """
-        self.model = OllamaEmbeddings(model=model_name)
+        self.model_name = model_name
+        self.model = KeepAliveOllamaEmbeddings(
+            model=model_name,
+            num_ctx=EMBEDDING_NUM_CTX,
+            num_thread=EMBEDDING_NUM_THREAD,
+            num_gpu=EMBEDDING_NUM_GPU,
+            keep_alive=OLLAMA_KEEP_ALIVE,
+        )
+        _embedding_models[model_name] = self.model
+        self.warmup()
         print(f"EmbeddingHandler initialized with model: {model_name}")
+        print(
+            f"Embedding options: num_ctx={EMBEDDING_NUM_CTX}, "
+            f"num_gpu={'auto' if EMBEDDING_NUM_GPU is None else EMBEDDING_NUM_GPU}, "
+            f"num_thread={'auto' if EMBEDDING_NUM_THREAD is None else EMBEDDING_NUM_THREAD}"
+        )
+
+    def warmup(self):
+        """
+        Sends a tiny embedding request so that Ollama loads the model into memory
+        now instead of on the first real request.
+        """
+        try:
+            self.model.embed_query("warmup")
+        except Exception as e:
+            print(f"Warning: Could not warm up embedding model. Error: {e}")
 
     def get_embedding_model(self) -> Embeddings:
         """
@@ -29,34 +95,59 @@ class EmbeddingHandler:
     def create_embedding(self, text: str) -> List[float]:
         """
         Creates a single embedding vector for a given text.
+        Results are cached, so embedding the same text again does not call Ollama.
         Args:
             text (str): The text to embed.
         Returns:
             List[float]: A list of floats representing the embedding vector.
         """
         try:
-            embedding = self.model.embed_query(text)
+            embedding = list(_cached_query_embedding(self.model_name, text))
             return embedding
         except Exception as e:
             print(f"Error creating embedding for text: '{text[:50]}...' Error: {e}")
             return []
 
-    def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def create_embeddings(
+        self,
+        texts: List[str],
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        max_workers: int = EMBEDDING_MAX_WORKERS,
+    ) -> List[List[float]]:
         """
         Creates embedding vectors for a list of texts.
+        The texts are sent to Ollama as concurrent requests instead of one after another,
+        so building a large knowledge base is not serialized on the HTTP round-trip per text.
         Args:
             texts (List[str]): A list of texts to embed.
+            batch_size (int): Number of texts handed to the workers at a time.
+            max_workers (int): Number of concurrent requests sent to Ollama.
+        Returns:
+            List[List[float]]: A list of embedding vectors in the same order as the texts.
+                               Texts that could not be embedded get an empty list.
+        """
+        embeddings = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for start in range(0, len(texts), batch_size):
+                batch = texts[start : start + batch_size]
+                embeddings.extend(executor.map(self._embed_document, batch))
+                print(f"Embedded {len(embeddings)}/{len(texts)} texts")
+        return embeddings
+
+    def _embed_document(self, text: str) -> List[float]:
+        """
+        Creates the embedding vector for a single document text.
+        Errors are caught here so that one failed text does not fail the whole batch.
+        Args:
+            text (str): The document text to embed.
         Returns:
-            List[List[float]]: A list of embedding vectors.
+            List[float]: The embedding vector, or an empty list in case of error.
         """
         try:
-            embeddings = self.model.embed_documents(texts)
-            return embeddings
+            return self.model.embed_documents([text])[0]
         except Exception as e:
-            print(f"Error creating embeddings for multiple texts. Error: {e}")
-            return [
-                [] for _ in texts
-            ]  # Return empty lists for each text in case of error
+            print(f"Error creating embedding for text: '{text[:50]}...' Error: {e}")
+            return []
 
 
 # Example usage for testing purposes
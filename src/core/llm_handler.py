@@ -1,7 +1,30 @@
 from langchain_community.chat_models import ChatOllama
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.language_models.chat_models import BaseChatModel
-from config import OLLAMA_LLM_MODEL, TEMPERATURE
+from typing import Any, Dict, Iterator, Optional
+from config import (
+    OLLAMA_LLM_MODEL,
+    OLLAMA_KEEP_ALIVE,
+    OLLAMA_NUM_CTX,
+    OLLAMA_NUM_BATCH,
+    OLLAMA_NUM_GPU,
+    OLLAMA_NUM_THREAD,
+    TEMPERATURE,
+)
+
+
+class BatchedChatOllama(ChatOllama):
+    """
+    ChatOllama client that also sends Ollama's num_batch option,
+    which the LangChain client does not expose.
+    """
+
+    num_batch: Optional[int] = None
+
+    @property
+    def _default_params(self) -> Dict[str, Any]:
+        params = super()._default_params
+        return {**params, "options": {**params["options"], "num_batch": self.num_batch}}
 
 
 class LLMHandler:
@@ -17,11 +40,35 @@ class LLMHandler:
         """
         self.model_name = model_name
         try:
-            self.model = ChatOllama(model=self.model_name, temperature=TEMPERATURE)
+            self.model = BatchedChatOllama(
+                model=self.model_name,
+                temperature=TEMPERATURE,
+                num_ctx=OLLAMA_NUM_CTX,
+                num_batch=OLLAMA_NUM_BATCH,
+                num_gpu=OLLAMA_NUM_GPU,
+                num_thread=OLLAMA_NUM_THREAD,
+                keep_alive=OLLAMA_KEEP_ALIVE,
+            )
         except Exception as e:
             print(f"Error initializing Ollama LLM model '{self.model_name}': {e}")
             raise
+        self.warmup()
         print(f"LLMHandler initialized with model: {self.model_name}")
+        print(
+            f"LLM options: num_ctx={OLLAMA_NUM_CTX}, num_batch={OLLAMA_NUM_BATCH}, "
+            f"num_gpu={'auto' if OLLAMA_NUM_GPU is None else OLLAMA_NUM_GPU}, "
+            f"num_thread={'auto' if OLLAMA_NUM_THREAD is None else OLLAMA_NUM_THREAD}"
+        )
+
+    def warmup(self):
+        """
+        Sends a tiny request that generates a single token, so that Ollama loads
+        the model into memory now instead of on the first user query.
+        """
+        try:
+            self.model.invoke([HumanMessage(content="ok")], num_predict=1)
+        except Exception as e:
+            print(f"Warning: Could not warm up LLM model '{self.model_name}': {e}")
 
     def get_llm(self) -> BaseChatModel:
         """
@@ -34,6 +81,9 @@ class LLMHandler:
     def generate_response(self, prompt: str, system_message: str = None) -> str:
         """
         Generates a response from the LLM based on the given prompt and an optional system message.
+        The system message is always sent first. Keep it identical between calls and put
+        per-call content (e.g. retrieved context) into the prompt, so Ollama can reuse
+        the cached prefill of the system message.
         Args:
             prompt (str): The user's prompt or question.
             system_message (str, optional): A system message to guide the LLM's behavior. Defaults to None.
@@ -52,6 +102,29 @@ class LLMHandler:
             print(f"Error generating response from LLM: {e}")
             return "An error occurred while generating the response."
 
+    def generate_response_stream(
+        self, prompt: str, system_message: str = None
+    ) -> Iterator[str]:
+        """
+        Generates a response from the LLM and yields it piece by piece while it is being decoded.
+        Args:
+            prompt (str): The user's prompt or question.
+            system_message (str, optional): A system message to guide the LLM's behavior. Defaults to None.
+        Yields:
+            str: The next piece of the generated response.
+        """
+        messages = []
+        if system_message:
+            messages.append(SystemMessage(content=system_message))
+        messages.append(HumanMessage(content=prompt))
+
+        try:
+            for chunk in self.model.stream(messages):
+                yield chunk.content
+        except Exception as e:
+            print(f"Error generating response from LLM: {e}")
+            yield "An error occurred while generating the response."
+
 
 # Example usage (for testing purposes, will be removed later)
 if __name__ == "__main__":
@@ -0,0 +1,59 @@
+from sentence_transformers import CrossEncoder
+from langchain_core.documents import Document
+from typing import List
+import numpy as np
+from config import RERANKER_MODEL
+
+
+class Reranker:
+    """
+    Reorders retrieved documents by relevance using a local cross-encoder model.
+    """
+
+    def __init__(self, model_name: str = RERANKER_MODEL):
+        """
+        Initializes the Reranker with a specific cross-encoder model.
+        Args:
+            model_name (str): The name of the cross-encoder model to use.
+        """
+        self.model_name = model_name
+        try:
+            self.model = CrossEncoder(self.model_name)
+        except Exception as e:
+            print(f"Error initializing reranker model '{self.model_name}': {e}")
+            raise
+        print(f"Reranker initialized with model: {self.model_name}")
+
+    def rerank(
+        self, query: str, documents: List[Document], top_k: int
+    ) -> List[Document]:
+        """
+        Scores each document against the query and returns the most relevant ones.
+        Args:
+            query (str): The query the documents were retrieved for.
+            documents (List[Document]): The candidate documents.
+            top_k (int): The number of documents to return.
+        Returns:
+            List[Document]: The top_k documents, most relevant first.
+        """
+        if not documents:
+            return []
+
+        scores = self.model.predict([(query, doc.page_content) for doc in documents])
+        ranking = np.argsort(scores)[::-1][:top_k]
+        return [documents[i] for i in ranking]
+
+
+# Example usage for testing purposes
+if __name__ == "__main__":
+    reranker = Reranker()
+
+    print("\n--- Rerank Test ---")
+    query = "How is DNA amplified?"
+    candidates = [
+        Document(page_content="Genomic sequencing is a key technique."),
+        Document(page_content="PCR is used to amplify DNA."),
+        Document(page_content="Proteins are built from amino acids."),
+    ]
+    for i, doc in enumerate(reranker.rerank(query, candidates, top_k=2)):
+        print(f"  Rank {i+1}: {doc.page_content}")
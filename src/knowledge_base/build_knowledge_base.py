@@ -1,41 +1,101 @@
 from src.utils.document_processor import DocumentProcessor
+from src.utils.chunk_cache import FileHashIndex
 from src.core.embedding_handler import EmbeddingHandler
 from src.knowledge_base.vector_database import VectorDatabase
 from config import (
     DATA_PATH,
+    CHUNK_CACHE_PATH,
+    INGEST_CACHE_PATH,
     OLLAMA_EMBEDDING_MODEL,
     CHROMA_DB_PATH,
     CHUNK_SIZE,
     CHUNK_OVERLAP,
+    USE_FLOAT16_EMBEDDINGS,
+    BUILD_BATCH_SIZE,
+    TEXT_SPLITTER,
 )
+from langchain_core.documents import Document
+from typing import List
+import argparse
+import hashlib
+import logging
 import os
-import shutil  # For cleaning up previous DB during testing/rebuilds
 
 
-def build_knowledge_base():
+def compute_chunk_ids(chunks: List[Document]) -> List[str]:
     """
-    Builds the knowledge base by loading documents, processing them,
+    Computes content-addressed IDs for chunks, from their source, their index
+    within the source and their text. Unchanged chunks keep their ID between builds.
+    Args:
+        chunks (List[Document]): The chunks in the order produced by the splitter.
+    Returns:
+        List[str]: One ID per chunk.
+    """
+    chunk_ids = []
+    chunk_counts = {}
+    for chunk in chunks:
+        source = str(chunk.metadata.get("source", ""))
+        index = chunk_counts.get(source, 0)
+        chunk_counts[source] = index + 1
+        chunk_ids.append(
+            hashlib.sha256(
+                (source + str(index) + chunk.page_content).encode("utf-8")
+            ).hexdigest()
+        )
+    return chunk_ids
+
+
+def store_chunks(
+    embedding_handler: EmbeddingHandler,
+    db_handler: VectorDatabase,
+    chunks: List[Document],
+    chunk_ids: List[str],
+):
+    """
+    Embeds a batch of chunks with concurrent requests to Ollama and stores them in ChromaDB.
+    Args:
+        embedding_handler (EmbeddingHandler): The handler used to create the embeddings.
+        db_handler (VectorDatabase): The database the chunks are stored in.
+        chunks (List[Document]): The chunks to store.
+        chunk_ids (List[str]): The IDs of the chunks.
+    """
+    print(f"Creating embeddings for {len(chunks)} chunks...")
+    embeddings = embedding_handler.create_embeddings(
+        [chunk.page_content for chunk in chunks]
+    )
+    db_handler.add_documents(chunks, embeddings=embeddings, ids=chunk_ids)
+
+
+def build_knowledge_base(force: bool = False):
+    """
+    Builds or updates the knowledge base by loading documents, splitting them,
     generating embeddings, and storing them in the ChromaDB.
+    The build is incremental: only chunks that are not stored yet are embedded,
+    and chunks of changed or removed files are deleted. Documents are streamed in
+    batches of BUILD_BATCH_SIZE chunks, so the whole corpus is never held in memory.
+    Args:
+        force (bool): If True, the collection is emptied first and all chunks are embedded again.
     """
     print("\n--- Starting Knowledge Base Build ---")
 
+    # Reuses the file hashes of previous builds for files that did not change
+    file_hashes = FileHashIndex(INGEST_CACHE_PATH)
+
     # Initialize Document Processor
-    processor = DocumentProcessor(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    processor = DocumentProcessor(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        text_splitter=TEXT_SPLITTER,
+        file_hashes=file_hashes,
+        cache_dir=CHUNK_CACHE_PATH,
+    )
 
-    # Load Documents
     print(f"Loading documents from: {DATA_PATH}")
-    documents = processor.load_documents_from_directory(DATA_PATH)
-    if not documents:
-        print(
-            "No documents found in the data directory. Please add your documents to the 'data/' folder."
-        )
-        return
-
-    # Split Documents into Chunks
-    chunks = processor.split_documents(documents)
-    if not chunks:
-        print("No chunks generated from documents.")
+    if not os.path.isdir(DATA_PATH):
+        # A missing data directory must not empty an existing knowledge base
+        print(f"Data directory not found at {DATA_PATH}.")
         return
+    file_paths = processor.find_files(DATA_PATH)
 
     # Initialize Embedding Handler
     print(f"Initializing embedding model: {OLLAMA_EMBEDDING_MODEL}")
@@ -45,20 +105,76 @@ def build_knowledge_base():
     # Initialize and Populate Vector Database (ChromaDB)
     print("Initializing ChromaDB...")
 
-    # Clean up any previous ChromaDB instance to ensure a fresh build
-    if os.path.exists(CHROMA_DB_PATH):
-        print(f"Deleting existing ChromaDB at {CHROMA_DB_PATH} for a fresh build.")
-        shutil.rmtree(CHROMA_DB_PATH)
-    os.makedirs(CHROMA_DB_PATH, exist_ok=True)
-
     db_handler = VectorDatabase(
-        embeddings_model=embeddings_model, persist_directory=CHROMA_DB_PATH
+        embeddings_model=embeddings_model,
+        persist_directory=CHROMA_DB_PATH,
+        embedding_model_name=OLLAMA_EMBEDDING_MODEL,
+    )
+
+    # Vectors of another embedding model cannot be compared with the new ones
+    stored_model = db_handler.get_stored_embedding_model()
+    if stored_model is None and db_handler.get_collection().count() > 0 and not force:
+        print(
+            "The embedding model of the knowledge base is unknown. If OLLAMA_EMBEDDING_MODEL "
+            "changed since it was built, rebuild it with --force."
+        )
+    elif stored_model is not None and stored_model != OLLAMA_EMBEDDING_MODEL:
+        print(
+            f"The knowledge base was embedded with '{stored_model}', "
+            f"rebuilding it with '{OLLAMA_EMBEDDING_MODEL}'."
+        )
+        force = True
+
+    if force:
+        # Empty the collection of any previous build to ensure a fresh build
+        db_handler.reset_collection()
+
+    # Load the chunks file by file and embed the ones that are not stored yet
+    all_chunk_ids = []
+    new_chunks = []
+    new_chunk_ids = []
+    new_count = 0
+    for file_chunks in processor.iter_file_chunks(file_paths):
+        chunk_ids = compute_chunk_ids(file_chunks)
+        all_chunk_ids.extend(chunk_ids)
+        existing_ids = db_handler.get_existing_ids(chunk_ids)
+        for chunk_id, chunk in zip(chunk_ids, file_chunks):
+            if chunk_id not in existing_ids:
+                new_chunks.append(chunk)
+                new_chunk_ids.append(chunk_id)
+        if len(new_chunks) >= BUILD_BATCH_SIZE:
+            store_chunks(embedding_handler, db_handler, new_chunks, new_chunk_ids)
+            new_count += len(new_chunks)
+            new_chunks, new_chunk_ids = [], []
+    if new_chunks:
+        store_chunks(embedding_handler, db_handler, new_chunks, new_chunk_ids)
+        new_count += len(new_chunks)
+    processor.chunk_cache.prune()
+    file_hashes.save()
+
+    if not all_chunk_ids:
+        # Chunks of files that were all removed must not stay in the knowledge base
+        db_handler.reset_collection()
+        print(
+            "No documents found in the data directory. Please add your documents to the 'data/' folder."
+        )
+        return
+    print(
+        f"{len(all_chunk_ids) - new_count} chunks were unchanged, {new_count} chunks were embedded."
     )
 
-    # Create a new database with all chunks
-    db = db_handler.initialize_db(chunks)
+    # Remove the chunks that no longer exist, e.g. of changed or removed files
+    deleted_count = db_handler.delete_documents_except(all_chunk_ids)
+    if deleted_count:
+        print(f"Deleted {deleted_count} outdated chunks from ChromaDB.")
+
+    db = db_handler.initialize_db()
 
-    if db:
+    if db is not None and USE_FLOAT16_EMBEDDINGS:
+        db_handler.write_float16_embeddings()
+
+    if db is not None:
+        db_handler.write_build_marker()
         print("Knowledge Base (ChromaDB) built successfully!")
         print(f"Database stored at: {CHROMA_DB_PATH}")
     else:
@@ -68,6 +184,21 @@ def build_knowledge_base():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the knowledge base.")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild the whole knowledge base instead of only embedding changed chunks.",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Also log every loaded file and every split.",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO, format="%(message)s"
+    )
 
     # Ensure that 'data/' exists and create a dummy file if empty for test
     if not os.path.exists(DATA_PATH):
@@ -86,7 +217,7 @@ if __name__ == "__main__":
         print(f"Created dummy file: {dummy_file_path} for testing.")
 
     try:
-        build_knowledge_base()
+        build_knowledge_base(force=args.force)
     finally:
         # Clean up the dummy file after test if it was created by this script
         if "dummy_file_path" in locals() and os.path.exists(dummy_file_path):
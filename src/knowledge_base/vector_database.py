@@ -1,9 +1,93 @@
-from langchain_community.vectorstores import Chroma
+import chromadb
 from langchain_core.embeddings import Embeddings
 from langchain_core.documents import Document
-from config import CHROMA_DB_PATH
-from typing import List, Optional
+from src.core.embedding_handler import EmbeddingHandler
+from config import (
+    CHROMA_DB_PATH,
+    CHROMA_COLLECTION_NAME,
+    CHROMA_BATCH_SIZE,
+    CHROMA_BUILD_MARKER,
+    OLLAMA_EMBEDDING_MODEL,
+    USE_FLOAT16_EMBEDDINGS,
+)
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+import glob
+import json
 import os
+import numpy as np
+import shutil
+import sqlite3
+import uuid
+
+if TYPE_CHECKING:
+    # Only needed for type hints, avoids loading the reranker model stack when building the DB
+    from src.core.reranker import Reranker
+
+# Float16 copy of all embeddings, stored in the persist directory. Every copy gets a new
+# matrix file; the index file lists its chunk IDs and names the matrix file they belong to
+FLOAT16_INDEX_FILE = "embeddings_fp16.json"
+FLOAT16_MATRIX_PATTERN = "embeddings_fp16_*.npy"
+
+# All stored and query embeddings are normalized to unit length, where the inner product
+# equals the cosine similarity but needs no per-comparison norms in the HNSW index
+COLLECTION_METADATA = {"hnsw:space": "ip"}
+
+# Collection metadata key of the embedding model the stored chunks were embedded with
+EMBEDDING_MODEL_KEY = "embedding_model"
+
+# Chroma clients by persist directory, shared by all VectorDatabase instances of the process
+_client_cache: Dict[str, chromadb.ClientAPI] = {}
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """
+    Scales vectors to unit length along the last axis, leaving zero vectors unchanged.
+    Args:
+        vectors (np.ndarray): A single vector or a matrix with one vector per row.
+    Returns:
+        np.ndarray: The normalized vectors.
+    """
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _maximal_marginal_relevance(
+    query_embedding: np.ndarray,
+    candidate_embeddings: np.ndarray,
+    k: int,
+    lambda_mult: float,
+) -> List[int]:
+    """
+    Selects the candidates that are similar to the query but diverse among each other.
+    All cosine similarities are computed once up front with matrix products, so each
+    selection step is a single vectorized update and argmax.
+    Args:
+        query_embedding (np.ndarray): The query embedding vector.
+        candidate_embeddings (np.ndarray): The candidate embeddings, one per row.
+        k (int): The number of candidates to select.
+        lambda_mult (float): Between 0 (maximum diversity) and 1 (maximum relevance).
+    Returns:
+        List[int]: The indices of the selected candidates, in selection order.
+    """
+    candidates = _normalize(candidate_embeddings)
+    query_similarity = candidates @ _normalize(query_embedding)
+    candidate_similarity = candidates @ candidates.T
+
+    selected = [int(np.argmax(query_similarity))]
+    available = np.ones(len(candidates), dtype=bool)
+    available[selected[0]] = False
+    # Highest similarity of every candidate to any of the selected ones
+    redundancy = candidate_similarity[selected[0]].copy()
+
+    while len(selected) < min(k, len(candidates)):
+        scores = lambda_mult * query_similarity - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        index = int(np.argmax(scores))
+        selected.append(index)
+        available[index] = False
+        np.maximum(redundancy, candidate_similarity[index], out=redundancy)
+    return selected
 
 
 class VectorDatabase:
@@ -12,53 +96,80 @@ class VectorDatabase:
     """
 
     def __init__(
-        self, embeddings_model: Embeddings, persist_directory: str = CHROMA_DB_PATH
+        self,
+        embeddings_model: Embeddings,
+        persist_directory: str = CHROMA_DB_PATH,
+        batch_size: int = CHROMA_BATCH_SIZE,
+        embedding_handler: Optional[EmbeddingHandler] = None,
+        reranker: Optional["Reranker"] = None,
+        embedding_model_name: str = OLLAMA_EMBEDDING_MODEL,
     ):
         """
         Initializes the VectorDatabase with an embedding model and a persistence directory.
         Args:
             embeddings_model (Embeddings): The embedding model to use for generating vectors.
             persist_directory (str): The directory where ChromaDB will store its data.
+            batch_size (int): Number of chunks written to ChromaDB per insert.
+            embedding_handler (Optional[EmbeddingHandler]): If given, query embeddings are
+                                                            created through its cache.
+            reranker (Optional[Reranker]): If given, search results are reranked by it.
+            embedding_model_name (str): The name of the embedding model, stored with the
+                                        collection to detect a change of the model.
         """
         self.embeddings_model = embeddings_model
+        self.embedding_model_name = embedding_model_name
+        self.embedding_handler = embedding_handler
+        self.reranker = reranker
         self.persist_directory = persist_directory
-        # Initialize Chroma client directly, will be used to create/load collection
+        # Native Chroma client, persists automatically on every write
+        # Opening a client is I/O heavy, so one client per directory is kept for the process
+        if self.persist_directory not in _client_cache:
+            _client_cache[self.persist_directory] = chromadb.PersistentClient(
+                path=self.persist_directory
+            )
+        self.client = _client_cache[self.persist_directory]
+        self.collection = None
+        # Chroma rejects inserts larger than its maximum batch size
+        self.batch_size = min(batch_size, self.client.get_max_batch_size())
         self.db = None
+        # Memory-mapped float16 embeddings and their row per chunk ID, loaded on first use
+        self._float16_embeddings = None
         print(
             f"VectorDatabase initialized. Data will be stored in: {self.persist_directory}"
         )
 
-    def initialize_db(self, documents: Optional[List[Document]] = None) -> Chroma:
+    def initialize_db(
+        self,
+        documents: Optional[List[Document]] = None,
+        embeddings: Optional[List[List[float]]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> Optional[chromadb.Collection]:
         """
         Initializes or loads the ChromaDB collection. If documents are provided,
-        it creates a new collection from them. Otherwise, it attempts to load
+        they are added to the collection. Otherwise, it attempts to load
         an existing collection.
         Args:
             documents (Optional[List[Document]]): List of documents to use for
                                                  creating a new collection.
+            embeddings (Optional[List[List[float]]]): Precomputed embeddings, one per document.
+                                                      If not given, the documents are embedded
+                                                      with the embedding model.
+            ids (Optional[List[str]]): IDs of the documents. Documents with an ID that is
+                                       already stored are overwritten. Random IDs if not given.
         Returns:
-            Chroma: The initialized or loaded ChromaDB instance.
+            Optional[chromadb.Collection]: The initialized or loaded ChromaDB collection,
+                                           or None if no collection was found.
         """
         if documents:
             print(f"Creating new ChromaDB from {len(documents)} documents...")
-            # Create a new collection from documents
-            self.db = Chroma.from_documents(
-                documents=documents,
-                embedding=self.embeddings_model,
-                persist_directory=self.persist_directory,
-            )
-            self.db.persist()  # Ensure the changes are written to disk
-            print("ChromaDB created and persisted.")
+            self._add_to_collection(documents, embeddings, ids)
+            self.db = self.get_collection()
+            print("ChromaDB created.")
         else:
             # Attempt to load existing collection
-            if os.path.exists(self.persist_directory) and os.listdir(
-                self.persist_directory
-            ):
+            if self.get_collection().count() > 0:
                 print(f"Loading existing ChromaDB from {self.persist_directory}...")
-                self.db = Chroma(
-                    persist_directory=self.persist_directory,
-                    embedding_function=self.embeddings_model,
-                )
+                self.db = self.get_collection()
                 print("ChromaDB loaded.")
             else:
                 print(
@@ -67,12 +178,19 @@ class VectorDatabase:
                 self.db = None  # Explicitly set to None if no DB is found/created
         return self.db
 
-    def add_documents(self, documents: List[Document]):
+    def add_documents(
+        self,
+        documents: List[Document],
+        embeddings: Optional[List[List[float]]] = None,
+        ids: Optional[List[str]] = None,
+    ):
         """
         Adds new documents to an existing ChromaDB collection.
         If the database hasn't been initialized, it will initialize it with these documents.
         Args:
             documents (List[Document]): List of new documents to add.
+            embeddings (Optional[List[List[float]]]): Precomputed embeddings, one per document.
+            ids (Optional[List[str]]): IDs of the documents. Random IDs if not given.
         """
         if not documents:
             print("No documents provided to add.")
@@ -80,19 +198,230 @@ class VectorDatabase:
 
         if self.db is None:
             print("Database not initialized. Initializing with provided documents.")
-            self.initialize_db(documents)
+            self.initialize_db(documents, embeddings, ids)
         else:
             print(f"Adding {len(documents)} new documents to ChromaDB...")
-            self.db.add_documents(documents)
-            self.db.persist()  # Ensure the changes are written to disk
-            print("Documents added and ChromaDB persisted.")
+            self._add_to_collection(documents, embeddings, ids)
+            print("Documents added to ChromaDB.")
 
-    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+    def get_collection(self) -> chromadb.Collection:
+        """
+        Returns the native Chroma collection, opening it on first use.
+        Returns:
+            chromadb.Collection: The knowledge base collection.
+        """
+        if self.collection is None:
+            # Embeddings are always passed explicitly, so no Chroma embedding function is needed
+            self.collection = self.client.get_or_create_collection(
+                CHROMA_COLLECTION_NAME,
+                embedding_function=None,
+                metadata=self._collection_metadata(),
+            )
+            # The distance of an existing collection cannot be changed. Searches still
+            # work, as all distances rank normalized vectors the same way.
+            space = (self.collection.metadata or {}).get("hnsw:space", "l2")
+            if space != COLLECTION_METADATA["hnsw:space"]:
+                print(
+                    f"Collection '{CHROMA_COLLECTION_NAME}' uses the '{space}' distance. "
+                    "Rebuild it with --force to use the faster inner product."
+                )
+            stored_model = self.get_stored_embedding_model()
+            if stored_model is not None and stored_model != self.embedding_model_name:
+                print(
+                    f"Collection '{CHROMA_COLLECTION_NAME}' was embedded with '{stored_model}', "
+                    f"but '{self.embedding_model_name}' is configured. Rebuild the knowledge base."
+                )
+        return self.collection
+
+    def get_stored_embedding_model(self) -> Optional[str]:
+        """
+        Returns the embedding model the collection was created for.
+        Returns:
+            Optional[str]: The model name, or None for collections of older builds.
+        """
+        return (self.get_collection().metadata or {}).get(EMBEDDING_MODEL_KEY)
+
+    def _collection_metadata(self) -> Dict[str, str]:
+        """
+        Returns the metadata new collections are created with. Chroma cannot change
+        the metadata of a collection without dropping its distance setting, so the
+        embedding model is only recorded when the collection is created.
+        Returns:
+            Dict[str, str]: The distance setting and the embedding model name.
+        """
+        return {**COLLECTION_METADATA, EMBEDDING_MODEL_KEY: self.embedding_model_name}
+
+    def reset_collection(self):
+        """
+        Deletes all data of the knowledge base collection and creates it again empty.
+        The database files stay open, which is much cheaper than deleting the directory.
+        """
+        try:
+            self.client.delete_collection(CHROMA_COLLECTION_NAME)
+        except Exception:
+            pass  # The collection does not exist yet, e.g. on the first build
+        self.collection = self.client.create_collection(
+            CHROMA_COLLECTION_NAME,
+            embedding_function=None,
+            metadata=self._collection_metadata(),
+        )
+        self.db = None
+        self._remove_orphaned_segments()
+        self._remove_build_marker()
+        # The chunk IDs do not change with the embedding model, so the old copy
+        # must not be reused for the new collection
+        self._remove_float16_embeddings()
+        print(f"Reset collection '{CHROMA_COLLECTION_NAME}' in {self.persist_directory}")
+
+    def _remove_orphaned_segments(self):
+        """
+        Deletes the index directories of deleted collections. Chroma keeps the HNSW
+        directory of a deleted collection on disk, so without this every reset would
+        leave a full copy of the old index behind.
+        """
+        # The segments still in use are only listed in Chroma's SQLite database
+        sqlite_path = os.path.join(self.persist_directory, "chroma.sqlite3")
+        try:
+            with sqlite3.connect(f"file:{sqlite_path}?mode=ro", uri=True) as connection:
+                live_segments = {
+                    row[0] for row in connection.execute("SELECT id FROM segments")
+                }
+        except sqlite3.Error as e:
+            print(f"Could not look up the segments of ChromaDB, keeping old indexes: {e}")
+            return
+
+        for entry in os.scandir(self.persist_directory):
+            if not entry.is_dir() or entry.name in live_segments:
+                continue
+            try:
+                uuid.UUID(entry.name)
+            except ValueError:
+                continue  # Not a segment directory
+            shutil.rmtree(entry.path, ignore_errors=True)
+            print(f"Removed index of a deleted collection: {entry.name}")
+
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Creates the embedding vector for a query, using the cached
+        embedding handler if one was given.
+        Args:
+            query (str): The query string to embed.
+        Returns:
+            List[float]: The query embedding vector, or an empty list in case of error.
+        """
+        if self.embedding_handler is not None:
+            return self.embedding_handler.create_embedding(query)
+        return self.embeddings_model.embed_query(query)
+
+    def get_existing_ids(self, ids: List[str]) -> Set[str]:
+        """
+        Looks up which of the given IDs are already stored in the collection.
+        Args:
+            ids (List[str]): The IDs to look up.
+        Returns:
+            Set[str]: The subset of IDs that exist in the collection.
+        """
+        existing_ids = set()
+        for start in range(0, len(ids), self.batch_size):
+            batch = ids[start : start + self.batch_size]
+            existing_ids.update(self.get_collection().get(ids=batch, include=[])["ids"])
+        return existing_ids
+
+    def delete_documents_except(self, ids: List[str]) -> int:
+        """
+        Deletes all documents from the collection whose ID is not in the given list,
+        e.g. chunks of files that were changed or removed since the last build.
+        Args:
+            ids (List[str]): The IDs of the documents to keep.
+        Returns:
+            int: The number of deleted documents.
+        """
+        keep_ids = set(ids)
+        stale_ids = [
+            id_
+            for id_ in self.get_collection().get(include=[])["ids"]
+            if id_ not in keep_ids
+        ]
+        for start in range(0, len(stale_ids), self.batch_size):
+            self.get_collection().delete(ids=stale_ids[start : start + self.batch_size])
+        return len(stale_ids)
+
+    def _add_to_collection(
+        self,
+        documents: List[Document],
+        embeddings: Optional[List[List[float]]] = None,
+        ids: Optional[List[str]] = None,
+    ):
+        """
+        Writes documents to the native collection in large batches.
+        One upsert per batch keeps the number of index updates and SQLite commits low.
+        Args:
+            documents (List[Document]): The documents to add.
+            embeddings (Optional[List[List[float]]]): Precomputed embeddings, one per document.
+            ids (Optional[List[str]]): IDs of the documents. Random IDs if not given.
+        """
+        if embeddings is None:
+            # Embed all documents in one pass before writing
+            embeddings = self.embeddings_model.embed_documents(
+                [document.page_content for document in documents]
+            )
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in documents]
+
+        # Skip documents whose embedding failed, Chroma cannot store empty vectors
+        embedded = [
+            (id_, document, embedding)
+            for id_, document, embedding in zip(ids, documents, embeddings)
+            if embedding
+        ]
+        if len(embedded) < len(documents):
+            print(
+                f"Skipping {len(documents) - len(embedded)} documents without embedding."
+            )
+
+        for start in range(0, len(embedded), self.batch_size):
+            batch = embedded[start : start + self.batch_size]
+            self.get_collection().upsert(
+                ids=[id_ for id_, _, _ in batch],
+                embeddings=_normalize(
+                    np.asarray([embedding for _, _, embedding in batch], dtype=np.float32)
+                ),
+                documents=[document.page_content for _, document, _ in batch],
+                metadatas=[document.metadata for _, document, _ in batch],
+            )
+            print(f"Stored {start + len(batch)}/{len(embedded)} documents in ChromaDB")
+
+    def similarity_search(
+        self, query: str, k: int = 4, fetch_k: Optional[int] = None
+    ) -> List[Document]:
         """
         Performs a similarity search in the ChromaDB.
+        If a reranker is set, fetch_k candidates are retrieved and reranked down to k.
         Args:
             query (str): The query string to search for.
             k (int): The number of most similar documents to retrieve.
+            fetch_k (Optional[int]): The number of candidates to retrieve for reranking.
+                                     Defaults to k.
+        Returns:
+            List[Document]: A list of retrieved LangChain Document objects.
+        """
+        return self.search_by_vector(query, self.embed_query(query), k, fetch_k)
+
+    def search_by_vector(
+        self,
+        query: str,
+        embedding: List[float],
+        k: int = 4,
+        fetch_k: Optional[int] = None,
+    ) -> List[Document]:
+        """
+        Performs a similarity search in the ChromaDB with an already computed query embedding.
+        Args:
+            query (str): The query string, used for reranking.
+            embedding (List[float]): The embedding vector of the query.
+            k (int): The number of most similar documents to retrieve.
+            fetch_k (Optional[int]): The number of candidates to retrieve for reranking.
+                                     Defaults to k.
         Returns:
             List[Document]: A list of retrieved LangChain Document objects.
         """
@@ -101,14 +430,263 @@ class VectorDatabase:
             return []
 
         print(f"Performing similarity search for query: '{query}'")
-        results = self.db.similarity_search(query, k=k)
+        if not embedding:
+            print("Could not embed query. Cannot perform similarity search.")
+            return []
+
+        if self.reranker is not None and fetch_k and fetch_k > k:
+            candidates = self._query_collection(embedding, fetch_k)
+            results = self.reranker.rerank(query, candidates, top_k=k)
+            print(
+                f"Reranked {len(candidates)} candidates, kept {len(results)} relevant documents."
+            )
+            return results
+
+        results = self._query_collection(embedding, k)
         print(f"Found {len(results)} relevant documents.")
         return results
 
+    def mmr_search(
+        self, query: str, k: int = 4, fetch_k: int = 50, lambda_mult: float = 0.5
+    ) -> List[Document]:
+        """
+        Performs a maximal marginal relevance search in the ChromaDB, which returns
+        chunks relevant to the query while avoiding near-duplicate chunks.
+        Args:
+            query (str): The query string to search for.
+            k (int): The number of documents to return.
+            fetch_k (int): The number of candidates to select from.
+            lambda_mult (float): Between 0 (maximum diversity) and 1 (maximum relevance).
+        Returns:
+            List[Document]: A list of retrieved LangChain Document objects.
+        """
+        if self.db is None:
+            print("Database not initialized. Cannot perform MMR search.")
+            return []
+
+        print(f"Performing MMR search for query: '{query}'")
+        embedding = self.embed_query(query)
+        if not embedding:
+            print("Could not embed query. Cannot perform MMR search.")
+            return []
+
+        results = self.db.query(
+            query_embeddings=_normalize(np.asarray([embedding], dtype=np.float32)),
+            n_results=fetch_k,
+            include=["documents", "metadatas"],
+        )
+        candidate_ids = results["ids"][0]
+        if not candidate_ids:
+            return []
+        candidate_embeddings = self._get_candidate_embeddings(candidate_ids)
+
+        selected = _maximal_marginal_relevance(
+            np.asarray(embedding, dtype=np.float32),
+            candidate_embeddings,
+            k,
+            lambda_mult,
+        )
+        documents, metadatas = results["documents"][0], results["metadatas"][0]
+        print(f"Selected {len(selected)} of {len(candidate_ids)} candidates.")
+        return [
+            Document(page_content=documents[i], metadata=metadatas[i] or {})
+            for i in selected
+        ]
+
+    def write_float16_embeddings(self):
+        """
+        Stores a float16 copy of all embeddings next to the database. Chroma only stores
+        float32 vectors; the half-size copy is memory-mapped for MMR computations.
+        If the copy is up to date it is kept. Otherwise the rows of chunks that still
+        exist are reused and only the embeddings of new chunks are read from Chroma.
+        """
+        collection = self.get_collection()
+        ids = collection.get(include=[])["ids"]
+        if not ids:
+            self._remove_float16_embeddings()
+            return
+
+        self._float16_embeddings = None  # Release a previously mapped copy
+        old_embeddings = self._get_float16_embeddings()
+        self._float16_embeddings = None
+        old_matrix, old_rows = old_embeddings if old_embeddings else (None, {})
+        if len(old_rows) == len(ids) and all(id_ in old_rows for id_ in ids):
+            print("Float16 copy of the embeddings is up to date.")
+            return
+
+        kept_ids = [id_ for id_ in ids if id_ in old_rows]
+        new_ids = [id_ for id_ in ids if id_ not in old_rows]
+        new_vectors = {}
+        for start in range(0, len(new_ids), self.batch_size):
+            batch = collection.get(
+                ids=new_ids[start : start + self.batch_size], include=["embeddings"]
+            )
+            new_vectors.update(
+                zip(batch["ids"], np.asarray(batch["embeddings"], dtype=np.float16))
+            )
+        dimension = (
+            old_matrix.shape[1]
+            if old_matrix is not None
+            else len(next(iter(new_vectors.values())))
+        )
+
+        # The matrix goes to a new file, as running apps may have memory-mapped the old
+        # copy. Replacing the index file then switches IDs and matrix in one step.
+        matrix_file = FLOAT16_MATRIX_PATTERN.replace("*", uuid.uuid4().hex)
+        matrix_path = os.path.join(self.persist_directory, matrix_file)
+        matrix = np.lib.format.open_memmap(
+            matrix_path,
+            mode="w+",
+            dtype=np.float16,
+            shape=(len(ids), dimension),
+        )
+        for start in range(0, len(kept_ids), self.batch_size):
+            batch = kept_ids[start : start + self.batch_size]
+            matrix[start : start + len(batch)] = old_matrix[
+                [old_rows[id_] for id_ in batch]
+            ]
+        for row, id_ in enumerate(new_ids, start=len(kept_ids)):
+            matrix[row] = new_vectors[id_]
+        matrix.flush()
+        del matrix, old_matrix, old_embeddings
+
+        index_path = os.path.join(self.persist_directory, FLOAT16_INDEX_FILE)
+        with open(index_path + ".tmp", "w") as f:
+            json.dump({"matrix_file": matrix_file, "ids": kept_ids + new_ids}, f)
+        os.replace(index_path + ".tmp", index_path)
+        self._remove_float16_matrices(keep=matrix_file)
+        print(
+            f"Stored float16 copy of {len(ids)} embeddings ({len(new_ids)} new) at: {matrix_path}"
+        )
+
+    def _remove_float16_embeddings(self):
+        """
+        Removes the float16 copy of the embeddings, e.g. when the collection is emptied.
+        """
+        self._float16_embeddings = None
+        try:
+            os.remove(os.path.join(self.persist_directory, FLOAT16_INDEX_FILE))
+        except FileNotFoundError:
+            pass
+        self._remove_float16_matrices()
+
+    def _remove_float16_matrices(self, keep: Optional[str] = None):
+        """
+        Removes the float16 matrix files that the index file no longer refers to.
+        Args:
+            keep (Optional[str]): The file name of the current matrix, which is kept.
+        """
+        pattern = os.path.join(self.persist_directory, FLOAT16_MATRIX_PATTERN)
+        for matrix_path in glob.glob(pattern):
+            if os.path.basename(matrix_path) == keep:
+                continue
+            try:
+                os.remove(matrix_path)
+            except OSError:
+                # Still memory-mapped by a running app on Windows, removed next time
+                pass
+
+    def write_build_marker(self):
+        """
+        Writes the marker file that tells the agent a build finished successfully.
+        """
+        marker_path = self._build_marker_path()
+        with open(marker_path, "w") as f:
+            json.dump(
+                {
+                    "collection": CHROMA_COLLECTION_NAME,
+                    "chunk_count": self.get_collection().count(),
+                },
+                f,
+            )
+        print(f"Wrote build marker: {marker_path}")
+
+    def _remove_build_marker(self):
+        """
+        Removes the build marker, so an interrupted rebuild is not reported as built.
+        """
+        try:
+            os.remove(self._build_marker_path())
+        except FileNotFoundError:
+            pass
+
+    def _build_marker_path(self) -> str:
+        """
+        Returns the path of the build marker file of this database.
+        Returns:
+            str: CHROMA_BUILD_MARKER, or the same file name in a custom persist directory.
+        """
+        return os.path.join(
+            self.persist_directory, os.path.basename(CHROMA_BUILD_MARKER)
+        )
+
+    def _get_float16_embeddings(self) -> Optional[Tuple[np.ndarray, Dict[str, int]]]:
+        """
+        Loads the float16 embeddings written by write_float16_embeddings, memory-mapped.
+        Returns:
+            Optional[Tuple[np.ndarray, Dict[str, int]]]: The embedding matrix and the row of
+                                                         each chunk ID, or None if not available.
+        """
+        if self._float16_embeddings is None:
+            index_path = os.path.join(self.persist_directory, FLOAT16_INDEX_FILE)
+            try:
+                with open(index_path) as f:
+                    index = json.load(f)
+                matrix = np.load(
+                    os.path.join(self.persist_directory, index["matrix_file"]),
+                    mmap_mode="r",
+                )
+            except FileNotFoundError:
+                # Not written yet, or a newer copy replaced it after the index was read
+                return None
+            rows = {id_: row for row, id_ in enumerate(index["ids"])}
+            self._float16_embeddings = (matrix, rows)
+        return self._float16_embeddings
+
+    def _get_candidate_embeddings(self, ids: List[str]) -> np.ndarray:
+        """
+        Returns the embeddings of the given chunks as a float32 matrix, read from the
+        float16 copy if it is enabled and up to date, otherwise from Chroma.
+        Args:
+            ids (List[str]): The chunk IDs.
+        Returns:
+            np.ndarray: One embedding per row, in the order of the IDs.
+        """
+        float16_embeddings = (
+            self._get_float16_embeddings() if USE_FLOAT16_EMBEDDINGS else None
+        )
+        if float16_embeddings is not None:
+            matrix, rows = float16_embeddings
+            if all(id_ in rows for id_ in ids):
+                return matrix[[rows[id_] for id_ in ids]].astype(np.float32)
+
+        stored = self.get_collection().get(ids=ids, include=["embeddings"])
+        embeddings_by_id = dict(zip(stored["ids"], stored["embeddings"]))
+        return np.asarray([embeddings_by_id[id_] for id_ in ids], dtype=np.float32)
+
+    def _query_collection(self, embedding: List[float], n_results: int) -> List[Document]:
+        """
+        Queries the native collection for the nearest chunks of an embedding.
+        LangChain Documents are only built here, at the return boundary.
+        Args:
+            embedding (List[float]): The query embedding vector.
+            n_results (int): The number of chunks to return.
+        Returns:
+            List[Document]: The nearest chunks, most similar first.
+        """
+        results = self.db.query(
+            query_embeddings=_normalize(np.asarray([embedding], dtype=np.float32)),
+            n_results=n_results,
+            include=["documents", "metadatas"],
+        )
+        return [
+            Document(page_content=text, metadata=metadata or {})
+            for text, metadata in zip(results["documents"][0], results["metadatas"][0])
+        ]
+
 
 # Example usage (for testing purposes, will be removed later)
 if __name__ == "__main__":
-    from src.core.embedding_handler import EmbeddingHandler
     from src.utils.document_processor import DocumentProcessor
     from config import OLLAMA_EMBEDDING_MODEL, CHROMA_DB_PATH
     import shutil  # For cleaning up test directory
@@ -145,8 +723,7 @@ if __name__ == "__main__":
             "forensics, genetic testing, and research. The process involves denaturation, annealing, and extension cycles."
         )
 
-    loaded_docs_for_db = processor.load_documents_from_directory(test_data_for_db_dir)
-    chunks_for_db = processor.split_documents(loaded_docs_for_db)
+    chunks_for_db = processor.process_directory(test_data_for_db_dir)
     print(f"Prepared {len(chunks_for_db)} chunks for the database.")
 
     # --- Testing VectorDatabase functionalities ---
@@ -157,7 +734,7 @@ if __name__ == "__main__":
 
     # Test 1: Create DB with documents
     initial_db = db_handler.initialize_db(chunks_for_db)
-    if initial_db:
+    if initial_db is not None:
         print("Initial DB creation successful.")
 
     # Test 2: Add more documents to existing DB
@@ -175,7 +752,7 @@ if __name__ == "__main__":
     existing_db = (
         loaded_db_handler.initialize_db()
     )  # Should load existing, not create new
-    if existing_db:
+    if existing_db is not None:
         print("Existing DB loaded successfully.")
 
     # Test 4: Perform similarity search
@@ -204,6 +781,16 @@ if __name__ == "__main__":
             f"  Result {i+1} (Source: {doc.metadata.get('source', 'N/A')}): {doc.page_content[:150]}..."
         )
 
+    # Test 5: Perform MMR search
+    print("\n--- Performing MMR Search ---")
+    query_text_4 = "What is DNA used for?"
+    results_4 = loaded_db_handler.mmr_search(query_text_4, k=2, fetch_k=5)
+    print(f"\nResults for '{query_text_4}':")
+    for i, doc in enumerate(results_4):
+        print(
+            f"  Result {i+1} (Source: {doc.metadata.get('source', 'N/A')}): {doc.page_content[:150]}..."
+        )
+
     # --- Cleanup ---
     os.remove(os.path.join(test_data_for_db_dir, "test_article_part1.txt"))
     os.remove(os.path.join(test_data_for_db_dir, "test_article_part2.txt"))
@@ -0,0 +1,217 @@
+from langchain_core.documents import Document
+from typing import Dict, List, Optional, Set
+import pyarrow as pa
+import pyarrow.parquet as pq
+import hashlib
+import json
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Columns of the cache files, metadata is stored as JSON text
+_CHUNK_SCHEMA = pa.schema([("page_content", pa.string()), ("metadata", pa.string())])
+
+
+def compute_file_hash(file_path: str) -> str:
+    """
+    Computes the SHA-256 hash of a file's content, reading it in blocks.
+    Args:
+        file_path (str): The path to the file.
+    Returns:
+        str: The hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FileHashIndex:
+    """
+    Remembers the content hash of files by their size and modification time, stored in a
+    JSON file. Unchanged files only need a stat call instead of being read and hashed.
+    """
+
+    def __init__(self, index_path: Optional[str] = None):
+        """
+        Initializes the FileHashIndex and loads the hashes stored by a previous run.
+        Args:
+            index_path (Optional[str]): The JSON file the hashes are stored in.
+                                        If None, the hashes are only kept in memory.
+        """
+        self.index_path = index_path
+        # Size, modification time and hash of every known file
+        self._entries: Dict[str, list] = {}
+        # Files looked up in this run; only these are saved
+        self._used: Set[str] = set()
+        if index_path is not None and os.path.isfile(index_path):
+            try:
+                with open(index_path) as f:
+                    self._entries = json.load(f)
+            except Exception as e:
+                logger.warning("Error reading file hash index %s: %s", index_path, e)
+
+    def get(self, file_path: str) -> str:
+        """
+        Returns the SHA-256 hash of a file's content, hashing the file only if its size
+        or modification time changed since it was last hashed.
+        Args:
+            file_path (str): The path to the file.
+        Returns:
+            str: The hex digest of the file content.
+        Raises:
+            OSError: If the file cannot be read.
+        """
+        stat = os.stat(file_path)
+        entry = self._entries.get(file_path)
+        if entry is None or entry[:2] != [stat.st_size, stat.st_mtime_ns]:
+            entry = [stat.st_size, stat.st_mtime_ns, compute_file_hash(file_path)]
+            self._entries[file_path] = entry
+        # Only files that could be hashed are saved to the index
+        self._used.add(file_path)
+        return entry[2]
+
+    def save(self):
+        """
+        Writes the hashes of all files looked up in this run to the index file.
+        """
+        if self.index_path is None:
+            return
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        with open(self.index_path, "w") as f:
+            json.dump({path: self._entries[path] for path in sorted(self._used)}, f)
+
+
+class ChunkCache:
+    """
+    Caches the chunks of each source file on disk as parquet, so unchanged files
+    do not need to be loaded and split again on the next knowledge base build.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        chunk_params: str,
+        file_hashes: Optional[FileHashIndex] = None,
+    ):
+        """
+        Initializes the ChunkCache.
+        Args:
+            cache_dir (str): The directory where the cache files are stored.
+            chunk_params (str): The chunking configuration the chunks are created with,
+                                see DocumentProcessor.chunk_params.
+            file_hashes (Optional[FileHashIndex]): Provides the content hash of the files.
+                                                   If None, every file is hashed.
+        """
+        self.cache_dir = cache_dir
+        self.file_hashes = file_hashes or FileHashIndex()
+        # Chunks created with other chunking parameters must not be reused
+        self.chunk_params = chunk_params
+        # Cache key of every file looked up so far; keys not in here are pruned
+        self._keys: Dict[str, str] = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def contains(self, file_path: str) -> bool:
+        """
+        Checks if chunks of the current content of a file are cached, without reading them.
+        Args:
+            file_path (str): The path to the source file.
+        Returns:
+            bool: True if the chunks of the file are cached. False as well if the file
+                  cannot be read, so it is left to the loader to report and skip it.
+        """
+        try:
+            return os.path.isfile(self._cache_path(file_path))
+        except OSError:
+            return False
+
+    def get(self, file_path: str) -> Optional[List[Document]]:
+        """
+        Returns the cached chunks of a file, if the file did not change since they were cached.
+        Args:
+            file_path (str): The path to the source file.
+        Returns:
+            Optional[List[Document]]: The cached chunks, or None on a cache miss
+                                      or if the file cannot be read.
+        """
+        try:
+            cache_path = self._cache_path(file_path)
+        except OSError:
+            return None
+        if not os.path.isfile(cache_path):
+            return None
+        try:
+            rows = pq.read_table(cache_path).to_pylist()
+        except Exception as e:
+            logger.warning("Error reading chunk cache for %s: %s", file_path, e)
+            return None
+        # Decoding the JSON creates new strings for every row, so the keys and the
+        # source path are interned to share one copy among all chunks
+        source = sys.intern(file_path)
+        chunks = []
+        for row in rows:
+            metadata = {
+                sys.intern(key): value
+                for key, value in json.loads(row["metadata"]).items()
+            }
+            if metadata.get("source") == source:
+                metadata["source"] = source
+            chunks.append(Document(page_content=row["page_content"], metadata=metadata))
+        return chunks
+
+    def put(self, file_path: str, chunks: List[Document]):
+        """
+        Stores the chunks of a file in the cache. Nothing is stored if the file
+        cannot be read, as there is no content hash to store its chunks under.
+        Args:
+            file_path (str): The path to the source file.
+            chunks (List[Document]): The chunks created from the file.
+        """
+        try:
+            cache_path = self._cache_path(file_path)
+        except OSError:
+            return
+        table = pa.table(
+            {
+                "page_content": [chunk.page_content for chunk in chunks],
+                "metadata": [json.dumps(chunk.metadata) for chunk in chunks],
+            },
+            schema=_CHUNK_SCHEMA,
+        )
+        pq.write_table(table, cache_path)
+
+    def prune(self) -> int:
+        """
+        Deletes all cache files that were not used since this cache was created,
+        i.e. those of changed or removed source files.
+        Returns:
+            int: The number of deleted cache files.
+        """
+        used_keys = set(self._keys.values())
+        removed_count = 0
+        for file_name in os.listdir(self.cache_dir):
+            key, extension = os.path.splitext(file_name)
+            if extension == ".parquet" and key not in used_keys:
+                os.remove(os.path.join(self.cache_dir, file_name))
+                removed_count += 1
+        return removed_count
+
+    def _cache_path(self, file_path: str) -> str:
+        """
+        Returns the cache file of a source file. The name is derived from the path, the
+        current content hash and the chunking parameters, so any change leads to a miss.
+        Args:
+            file_path (str): The path to the source file.
+        Returns:
+            str: The path to the cache file.
+        """
+        if file_path not in self._keys:
+            self._keys[file_path] = hashlib.sha256(
+                f"{file_path}\0{self.file_hashes.get(file_path)}\0{self.chunk_params}".encode(
+                    "utf-8"
+                )
+            ).hexdigest()
+        return os.path.join(self.cache_dir, f"{self._keys[file_path]}.parquet")
@@ -1,9 +1,382 @@
-from langchain_community.document_loaders import PyPDFLoader, TextLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain.text_splitter import Language, TextSplitter
 from langchain_core.documents import Document
-from config import CHUNK_SIZE, CHUNK_OVERLAP
+from src.utils.text_splitters import (
+    MemchunkTextSplitter,
+    PredictiveRecursiveSplitter,
+    RunningLengthTextSplitter,
+)
+from src.utils.chunk_cache import ChunkCache, FileHashIndex
+from config import (
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    CHUNK_SIZE_UNIT,
+    LOADER_MAX_WORKERS,
+    TEXT_SPLITTER,
+    TOKENIZER_ENCODING,
+)
+import io
+import logging
+import multiprocessing
+import pymupdf
 import os
-from typing import List
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from bisect import bisect_right
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import tiktoken
+
+logger = logging.getLogger(__name__)
+
+# Metadata keys shared by all documents and chunks, interned so every metadata dict
+# refers to the same key objects
+_SOURCE = sys.intern("source")
+_PAGE = sys.intern("page")
+_PAGE_OFFSETS = sys.intern("page_offsets")
+
+# Joins the pages of a PDF into one document
+PAGE_SEPARATOR = "\n\n"
+
+# Number of files loaded ahead of the consumer, at least two per worker process
+LOAD_BATCH_SIZE = 32
+
+# Language of the files that are split at code or heading boundaries first
+SPLITTER_LANGUAGES = {
+    ".py": Language.PYTHON,
+    ".R": Language.R,
+    ".md": Language.MARKDOWN,
+}
+
+# Increased whenever loading or splitting produces different chunks for the same file
+CHUNKER_VERSION = 4
+
+
+def _load_one(file_path: str) -> List[Document]:
+    """
+    Loads a single supported document (PDF, TXT). Defined at module level so it can
+    be sent to worker processes.
+    Args:
+        file_path (str): The path to the document.
+    Returns:
+        List[Document]: The loaded LangChain Document objects (one for all pages of a PDF,
+                        with the start of each page in its "page_offsets" metadata),
+                        or an empty list if the file is unsupported or could not be loaded.
+    """
+    loader = _get_loader(file_path)
+    if loader is None:
+        logger.debug(
+            "Skipping unsupported file type: %s", os.path.basename(file_path)
+        )
+        return []
+    return loader(file_path)
+
+
+def _iter_files(directory_path: str) -> Iterator[str]:
+    """
+    Yields the paths of all files in a directory and its subdirectories. os.scandir
+    returns the file type with each entry, so no extra stat call is needed per file.
+    Args:
+        directory_path (str): The path to the directory.
+    Yields:
+        str: The path of the next file.
+    """
+    try:
+        with os.scandir(directory_path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from _iter_files(entry.path)
+                elif entry.is_file():
+                    yield entry.path
+    except OSError as e:
+        # Like os.walk, skip directories that cannot be read
+        logger.warning("Error reading directory %s: %s", directory_path, e)
+
+
+def _file_outcome(
+    loader: Optional[Callable[[str], List[Document]]], documents: List[Document]
+) -> str:
+    """
+    Names the outcome of loading a file, for the loading summary.
+    Args:
+        loader (Optional[Callable[[str], List[Document]]]): The loader of the file.
+        documents (List[Document]): The documents the loader returned.
+    Returns:
+        str: "unsupported", "failed", "pdf" or "text".
+    """
+    if loader is None:
+        return "unsupported"
+    if not documents:
+        return "failed"
+    return "pdf" if loader is _load_pdf else "text"
+
+
+def _get_loader(file_path: str) -> Optional[Callable[[str], List[Document]]]:
+    """
+    Looks up the loader function of a file by its extension.
+    Args:
+        file_path (str): The path to the file.
+    Returns:
+        Optional[Callable[[str], List[Document]]]: The loader, or None if the file type
+                                                   is not supported.
+    """
+    return FILE_LOADERS.get(os.path.splitext(file_path)[1])
+
+
+def _iter_pdf_pages(pdf: pymupdf.Document) -> Iterator[str]:
+    """
+    Extracts the text of a PDF one page at a time.
+    Args:
+        pdf (pymupdf.Document): The opened PDF.
+    Yields:
+        str: The text of the next page.
+    """
+    for page in pdf:
+        yield page.get_text("text")
+
+
+def _load_pdf(file_path: str) -> List[Document]:
+    """
+    Loads all pages of a PDF into a single document.
+    Args:
+        file_path (str): The path to the PDF.
+    Returns:
+        List[Document]: The document, or an empty list if the PDF could not be loaded
+                        or contains no text.
+    """
+    file_path = sys.intern(file_path)
+    file_name = os.path.basename(file_path)
+    try:
+        # All pages go into one document, so chunks can span page boundaries.
+        # The start of each page is kept to find the page of every chunk later.
+        content = io.StringIO()
+        page_offsets = []
+        offset = 0
+        # PyMuPDF extracts the text with its native MuPDF backend, which is much
+        # faster than pure-Python PDF parsers
+        with pymupdf.open(file_path) as pdf:
+            for page_text in _iter_pdf_pages(pdf):
+                if page_offsets:
+                    content.write(PAGE_SEPARATOR)
+                    offset += len(PAGE_SEPARATOR)
+                page_offsets.append(offset)
+                content.write(page_text)
+                offset += len(page_text)
+        text = content.getvalue()
+        if not text.strip():
+            # E.g. scanned PDFs without a text layer, the same in every loading mode
+            logger.warning("No text found in PDF %s, it may need OCR", file_name)
+            return []
+        logger.debug("Loaded PDF: %s", file_name)
+        return [
+            Document(
+                page_content=text,
+                metadata={_SOURCE: file_path, _PAGE_OFFSETS: page_offsets},
+            )
+        ]
+    except Exception as e:
+        logger.warning("Error loading PDF %s: %s", file_name, e)
+    return []
+
+
+def _load_text_file(file_path: str) -> List[Document]:
+    """
+    Loads a text or code file. Bytes that are not valid UTF-8 are replaced instead of
+    failing the whole file.
+    Args:
+        file_path (str): The path to the file.
+    Returns:
+        List[Document]: The document, or an empty list if the file could not be loaded.
+    """
+    file_path = sys.intern(file_path)
+    file_name = os.path.basename(file_path)
+    try:
+        text = Path(file_path).read_bytes().decode("utf-8", errors="replace")
+        logger.debug("Loaded Text/Code: %s", file_name)
+        return [Document(page_content=text, metadata={_SOURCE: file_path})]
+    except Exception as e:
+        logger.warning("Error loading text/code file %s: %s", file_name, e)
+    return []
+
+
+# Loader function of every supported file extension, add more as needed
+FILE_LOADERS = {
+    ".pdf": _load_pdf,
+    ".txt": _load_text_file,
+    ".md": _load_text_file,
+    ".py": _load_text_file,
+    ".R": _load_text_file,
+    ".sh": _load_text_file,
+}
+
+
+def _count_tokens(encoding: "tiktoken.Encoding", text: str) -> int:
+    """
+    Counts the tokens of a text with a tiktoken encoding.
+    Args:
+        encoding (tiktoken.Encoding): The encoding to tokenize with.
+        text (str): The text to measure.
+    Returns:
+        int: The number of tokens.
+    """
+    # Special tokens are counted as plain text instead of raising an error
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _token_offsets(encoding: "tiktoken.Encoding", text: str) -> List[int]:
+    """
+    Tokenizes a text with a tiktoken encoding and returns where each token starts.
+    Args:
+        encoding (tiktoken.Encoding): The encoding to tokenize with.
+        text (str): The text to tokenize.
+    Returns:
+        List[int]: The start character of every token.
+    """
+    tokens = encoding.encode(text, disallowed_special=())
+    return encoding.decode_with_offsets(tokens)[1]
+
+
+def _create_text_splitter(
+    chunk_size: int,
+    chunk_overlap: int,
+    text_splitter: str,
+    chunk_size_unit: str,
+    language: Optional[Language] = None,
+) -> Tuple[TextSplitter, str]:
+    """
+    Creates the text splitter for the given chunking settings.
+    Args:
+        chunk_size (int): The maximum size of each text chunk.
+        chunk_overlap (int): The overlap between chunks.
+        text_splitter (str): The splitter backend, "recursive", "predictive" or "memchunk".
+        chunk_size_unit (str): The unit of chunk_size and chunk_overlap,
+                               "characters" or "tokens".
+        language (Optional[Language]): The language whose separators the recursive
+                                       splitter should use, ignored by the other splitters.
+    Returns:
+        Tuple[TextSplitter, str]: The splitter, and the suffix that identifies it
+                                  in the chunk parameters.
+    """
+    splitter_name = text_splitter.lower()
+    count_tokens = chunk_size_unit.lower() == "tokens" and splitter_name != "memchunk"
+    splitter_params = ""
+    if count_tokens:
+        # The encoder is created once here, creating it per call would dominate
+        # the splitting time
+        import tiktoken
+
+        encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+
+    if splitter_name == "memchunk":
+        # Chunks are measured in bytes and do not overlap
+        splitter = MemchunkTextSplitter(chunk_size=chunk_size)
+        splitter_params += ":memchunk"
+    elif splitter_name == "predictive":
+        # Tokenizes each text once instead of measuring pieces recursively
+        splitter = PredictiveRecursiveSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            token_offsets=partial(_token_offsets, encoding) if count_tokens else None,
+        )
+        splitter_params += ":predictive"
+    else:
+        length_function = partial(_count_tokens, encoding) if count_tokens else len
+        if language is not None:
+            # Splits at class, function or heading boundaries before paragraphs
+            splitter = RunningLengthTextSplitter.from_language(
+                language,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                length_function=length_function,
+            )
+        else:
+            splitter = RunningLengthTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                length_function=length_function,
+                is_separator_regex=False,
+            )
+    if count_tokens:
+        splitter_params += f":tokens:{TOKENIZER_ENCODING}"
+    return splitter, splitter_params
+
+
+def _split_document(text_splitter: TextSplitter, document: Document) -> List[Document]:
+    """
+    Splits a single document into chunks. For merged PDF pages, the page a chunk
+    starts on is looked up in the page offsets and stored as "page" metadata.
+    Args:
+        text_splitter (TextSplitter): The splitter to split the document with.
+        document (Document): The LangChain Document to split.
+    Returns:
+        List[Document]: The chunks of the document.
+    """
+    page_offsets = document.metadata.get(_PAGE_OFFSETS)
+    if page_offsets is None:
+        return text_splitter.split_documents([document])
+
+    # Chroma cannot store lists as metadata, so the offsets are not copied to the chunks
+    metadata = {
+        key: value for key, value in document.metadata.items() if key != _PAGE_OFFSETS
+    }
+    text = document.page_content
+    chunks = []
+    search_start = 0
+    for chunk_text in text_splitter.split_text(text):
+        # Chunks are in order, so each one is found after the start of the previous one
+        start = text.find(chunk_text, search_start)
+        if start == -1:
+            start = search_start
+        else:
+            search_start = start + 1
+        chunks.append(
+            Document(
+                page_content=chunk_text,
+                metadata={**metadata, _PAGE: bisect_right(page_offsets, start) - 1},
+            )
+        )
+    return chunks
+
+
+# Text splitter of a loader process, created once per process by _init_worker
+_SPLITTER: Optional[TextSplitter] = None
+
+
+def _init_worker(
+    chunk_size: int, chunk_overlap: int, text_splitter: str, chunk_size_unit: str
+):
+    """
+    Creates the text splitter of a loader process once, when the process starts.
+    Only the settings are sent to the process, not the splitter itself.
+    Args:
+        chunk_size (int): The maximum size of each text chunk.
+        chunk_overlap (int): The overlap between chunks.
+        text_splitter (str): The splitter backend, see _create_text_splitter.
+        chunk_size_unit (str): The unit of chunk_size and chunk_overlap.
+    """
+    global _SPLITTER
+    _SPLITTER, _ = _create_text_splitter(
+        chunk_size, chunk_overlap, text_splitter, chunk_size_unit
+    )
+
+
+def _load_and_split_pdf(file_path: str) -> List[Document]:
+    """
+    Loads a PDF and splits it with the splitter of the loader process, so only the
+    chunks are sent back to the main process.
+    Args:
+        file_path (str): The path to the PDF.
+    Returns:
+        List[Document]: The chunks of the PDF, or an empty list if it could not be loaded.
+    """
+    return [
+        chunk
+        for document in _load_pdf(file_path)
+        for chunk in _split_document(_SPLITTER, document)
+    ]
 
 
 class DocumentProcessor:
@@ -12,22 +385,68 @@ class DocumentProcessor:
     """
 
     def __init__(
-        self, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP
+        self,
+        chunk_size: int = CHUNK_SIZE,
+        chunk_overlap: int = CHUNK_OVERLAP,
+        max_workers: Optional[int] = LOADER_MAX_WORKERS,
+        text_splitter: str = TEXT_SPLITTER,
+        chunk_size_unit: str = CHUNK_SIZE_UNIT,
+        file_hashes: Optional[FileHashIndex] = None,
+        cache_dir: Optional[str] = None,
     ):
         """
         Initializes the DocumentProcessor with specified chunking parameters.
         Args:
             chunk_size (int): The maximum size of each text chunk.
             chunk_overlap (int): The number of characters to overlap between chunks.
+            max_workers (Optional[int]): The number of processes loading files in parallel.
+                                         None uses one process per CPU.
+            text_splitter (str): The splitter backend, "recursive", "predictive" or "memchunk".
+            chunk_size_unit (str): The unit of chunk_size and chunk_overlap for the
+                                   recursive splitter, "characters" or "tokens".
+            file_hashes (Optional[FileHashIndex]): Provides the content hash of the files,
+                                                   used to skip duplicate files.
+                                                   If None, every file is hashed.
+            cache_dir (Optional[str]): The directory the chunks of each file are cached in.
+                                       If None, chunks are not cached.
         """
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            is_separator_regex=False,
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.max_workers = max_workers
+        self.file_hashes = file_hashes or FileHashIndex()
+        # Identifies the chunking configuration, e.g. for the chunk cache
+        self.chunk_params = f"{chunk_size}:{chunk_overlap}:v{CHUNKER_VERSION}"
+        self.text_splitter_name = text_splitter
+        self.chunk_size_unit = chunk_size_unit
+        self.text_splitter, splitter_params = _create_text_splitter(
+            chunk_size, chunk_overlap, text_splitter, chunk_size_unit
         )
-        print(
-            f"DocumentProcessor initialized with chunk_size={chunk_size}, chunk_overlap={chunk_overlap}"
+        self.chunk_params += splitter_params
+        # Code and Markdown files get a splitter with separators for their language.
+        # Only the recursive splitter supports language-specific separators.
+        self._splitters = {}
+        if isinstance(self.text_splitter, RunningLengthTextSplitter):
+            self._splitters = {
+                extension: _create_text_splitter(
+                    chunk_size, chunk_overlap, text_splitter, chunk_size_unit, language
+                )[0]
+                for extension, language in SPLITTER_LANGUAGES.items()
+            }
+            self.chunk_params += ":code"
+
+        # Chunks are cached by file path, content hash and chunk_params, so changing a
+        # file, the chunking settings or CHUNKER_VERSION leads to a cache miss
+        self.chunk_cache = (
+            ChunkCache(cache_dir, self.chunk_params, file_hashes=self.file_hashes)
+            if cache_dir is not None
+            else None
+        )
+        logger.info(
+            "DocumentProcessor initialized with chunk_size=%s, chunk_overlap=%s, text_splitter=%s, chunk_size_unit=%s",
+            chunk_size,
+            chunk_overlap,
+            text_splitter,
+            chunk_size_unit,
         )
 
     def load_documents_from_directory(self, directory_path: str) -> List[Document]:
@@ -38,37 +457,291 @@ class DocumentProcessor:
         Returns:
             List[Document]: A list of loaded LangChain Document objects.
         """
-        loaded_documents = []
+        loaded_documents = self.load_documents(self.find_files(directory_path))
+
+        logger.info("Total documents loaded: %d", len(loaded_documents))
+        return loaded_documents
+
+    def process_directory(self, directory_path: str) -> List[Document]:
+        """
+        Loads all supported documents from a given directory and splits them with a
+        single split_documents call, instead of one call per file.
+        Args:
+            directory_path (str): The path to the directory containing documents.
+        Returns:
+            List[Document]: The chunks of all documents, in file order.
+        """
+        return self.split_documents(self.load_documents_from_directory(directory_path))
+
+    def find_files(self, directory_path: str) -> List[str]:
+        """
+        Lists all files in a given directory and its subdirectories. Of several supported
+        files with identical content (e.g. the same paper downloaded twice), only one is kept.
+        Args:
+            directory_path (str): The path to the directory containing documents.
+        Returns:
+            List[str]: The paths of all files found, without duplicates.
+        """
         if not os.path.isdir(directory_path):
-            print(f"Error: Directory not found at {directory_path}")
+            logger.error("Directory not found at %s", directory_path)
             return []
 
-        for root, _, files in os.walk(directory_path):
-            for file_name in files:
-                file_path = os.path.join(root, file_name)
-                if file_name.endswith(".pdf"):
-                    try:
-                        loader = PyPDFLoader(file_path)
-                        loaded_documents.extend(loader.load())
-                        print(f"Loaded PDF: {file_name}")
-                    except Exception as e:
-                        print(f"Error loading PDF {file_name}: {e}")
-                elif file_name.endswith(
-                    (".txt", ".md", ".py", ".R", ".sh")
-                ):  # Add more as needed
-                    try:
-                        loader = TextLoader(file_path, encoding="utf-8")
-                        loaded_documents.extend(loader.load())
-                        print(f"Loaded Text/Code: {file_name}")
-                    except Exception as e:
-                        print(f"Error loading text/code file {file_name}: {e}")
-                else:
-                    print(f"Skipping unsupported file type: {file_name}")
-                    pass
-
-        print(f"Total documents loaded: {len(loaded_documents)}")
+        return self._drop_duplicate_files(list(_iter_files(directory_path)))
+
+    def _drop_duplicate_files(self, file_paths: List[str]) -> List[str]:
+        """
+        Removes files whose content is identical to another file in the list.
+        Of each group of duplicates, the first path in sort order is kept, so the same
+        file is kept on every build.
+        Args:
+            file_paths (List[str]): The paths of the files.
+        Returns:
+            List[str]: The paths without duplicates, in their original order.
+        """
+        kept_by_hash = {}
+        # Unsupported files are not loaded anyway, unreadable ones are left to the loader
+        # to report
+        unhashed_paths = set()
+        for file_path in file_paths:
+            if _get_loader(file_path) is None:
+                unhashed_paths.add(file_path)
+                continue
+            try:
+                file_hash = self.file_hashes.get(file_path)
+            except OSError:
+                unhashed_paths.add(file_path)
+                continue
+            kept_path = kept_by_hash.get(file_hash)
+            if kept_path is None or file_path < kept_path:
+                kept_by_hash[file_hash] = file_path
+
+        kept_paths = unhashed_paths.union(kept_by_hash.values())
+        unique_paths = [file_path for file_path in file_paths if file_path in kept_paths]
+        if len(unique_paths) < len(file_paths):
+            logger.info(
+                "Skipping %d duplicate files.", len(file_paths) - len(unique_paths)
+            )
+        return unique_paths
+
+    def load_document(self, file_path: str) -> List[Document]:
+        """
+        Loads a single supported document (PDF, TXT).
+        Args:
+            file_path (str): The path to the document.
+        Returns:
+            List[Document]: The loaded LangChain Document objects (one for all pages of a PDF,
+                            with the start of each page in its "page_offsets" metadata),
+                            or an empty list if the file is unsupported or could not be loaded.
+        """
+        return _load_one(file_path)
+
+    def load_documents(self, file_paths: List[str]) -> List[Document]:
+        """
+        Loads several documents in parallel, see iter_loaded_files.
+        Args:
+            file_paths (List[str]): The paths to the documents.
+        Returns:
+            List[Document]: The loaded LangChain Document objects, in the order of the files.
+        """
+        loaded_documents = []
+        for documents in self.iter_loaded_files(file_paths):
+            loaded_documents.extend(documents)
         return loaded_documents
 
+    def iter_loaded_files(
+        self, file_paths: List[str], split: bool = False
+    ) -> Iterator[List[Document]]:
+        """
+        Loads documents in batches and yields the documents of one file at a time.
+        PDFs are parsed in worker processes, as PyMuPDF is CPU-bound and not thread-safe.
+        Meanwhile, the text files of the batch are read concurrently, as reading them
+        only waits for the disk. Only one batch is held in memory at a time.
+        Args:
+            file_paths (List[str]): The paths to the documents.
+            split (bool): Whether to yield the chunks of each file instead. PDFs are
+                          then split in the worker processes as well.
+        Yields:
+            List[Document]: The loaded documents, or chunks, of each file, in the order
+                            of the files.
+        """
+        max_workers = self.max_workers or os.cpu_count() or 1
+        loaders = [_get_loader(file_path) for file_path in file_paths]
+        pdf_count = loaders.count(_load_pdf)
+        # Starting worker processes is not worth it for a single PDF
+        executor = None
+        if pdf_count > 1 and max_workers > 1:
+            # Each worker creates its splitter once instead of receiving it with every PDF
+            splitter_args = (
+                self.chunk_size,
+                self.chunk_overlap,
+                self.text_splitter_name,
+                self.chunk_size_unit,
+            )
+            # Spawned workers start from a fresh interpreter; forking would copy the
+            # threads and locks of the already open Chroma client into them
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker if split else None,
+                initargs=splitter_args if split else (),
+            )
+        pdf_task = _load_and_split_pdf if split else _load_pdf
+        # Reading text files only waits for the disk, so the reads overlap in threads.
+        # A plain thread pool also works when the caller already runs an event loop.
+        thread_pool = (
+            ThreadPoolExecutor() if loaders.count(_load_text_file) > 1 else None
+        )
+        batch_size = max(LOAD_BATCH_SIZE, 2 * max_workers)
+        stats = Counter()
+        try:
+            for start in range(0, len(file_paths), batch_size):
+                batch = list(
+                    zip(
+                        file_paths[start : start + batch_size],
+                        loaders[start : start + batch_size],
+                    )
+                )
+                pdf_futures = {}
+                if executor is not None:
+                    pdf_futures = {
+                        file_path: executor.submit(pdf_task, file_path)
+                        for file_path, loader in batch
+                        if loader is _load_pdf
+                    }
+                text_paths = [
+                    file_path
+                    for file_path, loader in batch
+                    if loader is _load_text_file
+                ]
+                text_documents = {}
+                if text_paths and thread_pool is not None:
+                    text_documents = dict(
+                        zip(text_paths, thread_pool.map(_load_text_file, text_paths))
+                    )
+                for file_path, loader in batch:
+                    if file_path in pdf_futures:
+                        documents = pdf_futures[file_path].result()
+                        stats[_file_outcome(loader, documents)] += 1
+                        yield documents
+                        continue
+                    if file_path in text_documents:
+                        documents = text_documents[file_path]
+                    else:
+                        documents = _load_one(file_path)
+                    stats[_file_outcome(loader, documents)] += 1
+                    yield self.split_documents(documents) if split else documents
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if thread_pool is not None:
+                thread_pool.shutdown()
+            # One summary instead of a message per file
+            if stats:
+                logger.info("Loaded files: %s", dict(stats))
+
+    def iter_documents(self, directory_path: str) -> Iterator[Document]:
+        """
+        Loads all supported documents from a given directory, one document at a time.
+        Args:
+            directory_path (str): The path to the directory containing documents.
+        Yields:
+            Document: The next loaded LangChain Document (one per file, all pages of a PDF
+                      are merged into one document).
+        """
+        for documents in self.iter_loaded_files(self.find_files(directory_path)):
+            yield from documents
+
+    def iter_chunks(self, directory_path: str) -> Iterator[Document]:
+        """
+        Loads and splits all supported documents from a given directory. Each file
+        is split as soon as it is loaded, so the whole corpus is never held in memory.
+        Args:
+            directory_path (str): The path to the directory containing documents.
+        Yields:
+            Document: The next chunk.
+        """
+        for file_chunks in self.iter_file_chunks(self.find_files(directory_path)):
+            yield from file_chunks
+
+    def iter_file_chunks(self, file_paths: List[str]) -> Iterator[List[Document]]:
+        """
+        Loads and splits the documents of the given files, one file at a time. If a cache
+        directory was given, chunks of files that did not change since they were cached
+        are read from the chunk cache; only the other files are loaded and split and
+        then added to the cache. Files of unsupported types are skipped without being
+        read, so they are neither hashed nor cached.
+        Args:
+            file_paths (List[str]): The paths to the files, e.g. from find_files.
+        Yields:
+            List[Document]: The chunks of each supported file, in file order.
+        """
+        supported_paths = [
+            file_path for file_path in file_paths if _get_loader(file_path) is not None
+        ]
+        if len(supported_paths) < len(file_paths):
+            logger.info(
+                "Skipping %d files of unsupported types.",
+                len(file_paths) - len(supported_paths),
+            )
+        file_paths = supported_paths
+
+        if self.chunk_cache is None:
+            chunk_count = 0
+            for file_chunks in self.iter_loaded_files(file_paths, split=True):
+                chunk_count += len(file_chunks)
+                yield file_chunks
+            logger.info("Split %d files into %d chunks.", len(file_paths), chunk_count)
+            return
+
+        cached_file_paths = {
+            file_path
+            for file_path in file_paths
+            if self.chunk_cache.contains(file_path)
+        }
+        changed_file_paths = [
+            file_path for file_path in file_paths if file_path not in cached_file_paths
+        ]
+        logger.info(
+            "%d files loaded from chunk cache, %d files need to be processed.",
+            len(cached_file_paths),
+            len(changed_file_paths),
+        )
+
+        # The new or changed files are loaded and split in the background,
+        # in the order they are needed
+        split_files = self.iter_loaded_files(changed_file_paths, split=True)
+        new_chunk_count = 0
+        for file_path in file_paths:
+            if file_path in cached_file_paths:
+                file_chunks = self.chunk_cache.get(file_path)
+                if file_chunks is not None:
+                    yield file_chunks
+                    continue
+                # The cache file could not be read, load the file again
+                file_chunks = self.split_documents(self.load_document(file_path))
+            else:
+                file_chunks = next(split_files)
+            self.chunk_cache.put(file_path, file_chunks)
+            new_chunk_count += len(file_chunks)
+            yield file_chunks
+        # Shut the loader down and log its summary before the split summary
+        split_files.close()
+        if changed_file_paths:
+            logger.info(
+                "Split %d files into %d chunks.", len(changed_file_paths), new_chunk_count
+            )
+
+    def _get_splitter(self, document: Document) -> TextSplitter:
+        """
+        Picks the splitter for a document by the extension of its source file.
+        Args:
+            document (Document): The LangChain Document to split.
+        Returns:
+            TextSplitter: The splitter for the language of the file, or the default one.
+        """
+        extension = os.path.splitext(document.metadata.get(_SOURCE, ""))[1]
+        return self._splitters.get(extension, self.text_splitter)
+
     def split_documents(self, documents: List[Document]) -> List[Document]:
         """
         Splits a list of LangChain Documents into smaller chunks.
@@ -78,16 +751,22 @@ class DocumentProcessor:
             List[Document]: A list of smaller, chunked LangChain Document objects.
         """
         if not documents:
-            print("No documents to split.")
+            logger.debug("No documents to split.")
             return []
 
-        chunks = self.text_splitter.split_documents(documents)
-        print(f"Original documents split into {len(chunks)} chunks.")
+        chunks = [
+            chunk
+            for document in documents
+            for chunk in _split_document(self._get_splitter(document), document)
+        ]
+        logger.debug("Original documents split into %d chunks.", len(chunks))
         return chunks
 
 
 # Example usage for testing purposes
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s")
+
     # Create a dummy data directory and some files for testing
     test_data_dir = "temp_test_data"
     os.makedirs(test_data_dir, exist_ok=True)
@@ -113,14 +792,11 @@ if __name__ == "__main__":
 
     processor = DocumentProcessor(chunk_size=200, chunk_overlap=50)
 
-    print("\n--- Loading Documents Test ---")
+    print("\n--- Loading and Splitting Documents Test ---")
     # Ensure DATA_PATH is set correctly in config.py or use the test_data_dir here
 
-    loaded_docs = processor.load_documents_from_directory(test_data_dir)
-
-    print("\n--- Splitting Documents Test ---")
-    if loaded_docs:
-        chunks = processor.split_documents(loaded_docs)
+    chunks = processor.process_directory(test_data_dir)
+    if chunks:
         for i, chunk in enumerate(chunks):
             print(f"Chunk {i+1} (Length: {len(chunk.page_content)}):")
             print(f"  Content: '{chunk.page_content[:200]}...'")
@@ -0,0 +1,199 @@
+from langchain.text_splitter import RecursiveCharacterTextSplitter, TextSplitter
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Callable, Deque, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RunningLengthTextSplitter(RecursiveCharacterTextSplitter):
+    """
+    RecursiveCharacterTextSplitter that measures every piece only once while merging
+    pieces into chunks. The base implementation measures the first piece of a chunk
+    again whenever it is dropped from the overlap, and copies the list of pieces on
+    every drop. Both add up on long documents with many small pieces.
+    """
+
+    def _merge_splits(self, splits: Iterable[str], separator: str) -> List[str]:
+        """
+        Merges pieces of text into chunks of at most chunk_size, with chunk_overlap
+        between consecutive chunks. Produces the same chunks as the base implementation.
+        Args:
+            splits (Iterable[str]): The pieces of text, in order.
+            separator (str): The separator the pieces are joined with.
+        Returns:
+            List[str]: The merged chunks.
+        """
+        separator_len = self._length_function(separator)
+
+        docs = []
+        # Pieces of the current chunk with their length, and the running chunk length
+        current_doc: Deque[Tuple[str, int]] = deque()
+        total = 0
+        for split in splits:
+            split_len = self._length_function(split)
+            if (
+                total + split_len + (separator_len if current_doc else 0)
+                > self._chunk_size
+            ):
+                if total > self._chunk_size:
+                    logger.warning(
+                        "Created a chunk of size %d, which is longer than the specified %d",
+                        total,
+                        self._chunk_size,
+                    )
+                if current_doc:
+                    doc = self._join_docs([piece for piece, _ in current_doc], separator)
+                    if doc is not None:
+                        docs.append(doc)
+                    # Drop pieces from the start until only the overlap is left
+                    # and the next piece fits into the chunk
+                    while current_doc and (
+                        total > self._chunk_overlap
+                        or (
+                            total + split_len + separator_len > self._chunk_size
+                            and total > 0
+                        )
+                    ):
+                        _, piece_len = current_doc.popleft()
+                        total -= piece_len + (separator_len if current_doc else 0)
+            current_doc.append((split, split_len))
+            total += split_len + (separator_len if len(current_doc) > 1 else 0)
+        doc = self._join_docs([piece for piece, _ in current_doc], separator)
+        if doc is not None:
+            docs.append(doc)
+        return docs
+
+
+class MemchunkTextSplitter(TextSplitter):
+    """
+    Text splitter backed by memchunk, a SIMD-accelerated byte chunker written in Rust.
+    It is much faster than the recursive splitter, but chunk_size is measured in UTF-8
+    bytes, chunks do not overlap and only single-character delimiters are used.
+    """
+
+    # Chunks end at the last newline, sentence end or space that fits into the chunk
+    DELIMITERS = b"\n.?! "
+
+    def __init__(self, chunk_size: int, **kwargs):
+        """
+        Initializes the MemchunkTextSplitter.
+        Args:
+            chunk_size (int): The target size of each chunk in bytes.
+            **kwargs: Further arguments for TextSplitter. Overlap is not supported.
+        """
+        try:
+            import memchunk
+        except ImportError as e:
+            raise ImportError(
+                "The memchunk text splitter requires the memchunk package: pip install memchunk"
+            ) from e
+        kwargs["chunk_overlap"] = 0
+        super().__init__(chunk_size=chunk_size, **kwargs)
+        self._chunk_offsets = memchunk.chunk_offsets
+
+    def split_text(self, text: str) -> List[str]:
+        """
+        Splits a text into chunks at delimiter boundaries.
+        Args:
+            text (str): The text to split.
+        Returns:
+            List[str]: The chunks, without surrounding whitespace and without empty chunks.
+        """
+        data = text.encode("utf-8")
+        chunks = []
+        for start, end in self._chunk_offsets(
+            data, size=self._chunk_size, delimiters=self.DELIMITERS
+        ):
+            # A chunk without any delimiter is cut at the byte limit, which can split
+            # a multi-byte character
+            chunk = data[start:end].decode("utf-8", errors="replace")
+            if self._strip_whitespace:
+                chunk = chunk.strip()
+            if chunk:
+                chunks.append(chunk)
+        return chunks
+
+
+class PredictiveRecursiveSplitter(TextSplitter):
+    """
+    Text splitter that measures each text only once. The start offset of every token is
+    computed up front, so the end of a chunk of chunk_size tokens is read directly from
+    the offsets instead of measuring ever smaller pieces recursively. The chunk is then
+    shortened to the strongest separator in its second half, and the token position of
+    that separator is found by binary search over the offsets.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int,
+        chunk_overlap: int,
+        token_offsets: Optional[Callable[[str], Sequence[int]]] = None,
+        separators: Optional[List[str]] = None,
+        **kwargs,
+    ):
+        """
+        Initializes the PredictiveRecursiveSplitter.
+        Args:
+            chunk_size (int): The maximum number of tokens per chunk.
+            chunk_overlap (int): The number of tokens to overlap between chunks.
+            token_offsets (Optional[Callable[[str], Sequence[int]]]): Returns the start
+                character of every token of a text. If not given, every character is a token.
+            separators (Optional[List[str]]): Separators chunks should end at, strongest first.
+            **kwargs: Further arguments for TextSplitter.
+        """
+        super().__init__(chunk_size=chunk_size, chunk_overlap=chunk_overlap, **kwargs)
+        self._token_offsets = token_offsets
+        self._separators = separators or ["\n\n", "\n", ". ", " "]
+
+    def split_text(self, text: str) -> List[str]:
+        """
+        Splits a text into chunks of at most chunk_size tokens.
+        Args:
+            text (str): The text to split.
+        Returns:
+            List[str]: The chunks, without empty chunks.
+        """
+        offsets = (
+            self._token_offsets(text) if self._token_offsets else range(len(text))
+        )
+        token_count = len(offsets)
+        chunks = []
+        start_token = 0
+        while start_token < token_count:
+            end_token = min(start_token + self._chunk_size, token_count)
+            start_char = offsets[start_token]
+            end_char = offsets[end_token] if end_token < token_count else len(text)
+            if end_token < token_count:
+                # End at the strongest separator in the second half of the chunk
+                min_char = offsets[start_token + (end_token - start_token + 1) // 2]
+                for separator in self._separators:
+                    position = text.rfind(separator, min_char, end_char)
+                    if position != -1:
+                        # Chunks end at the start of the token the separator ends in,
+                        # so no token is split between two chunks
+                        end_token = (
+                            bisect_right(offsets, position + len(separator), start_token) - 1
+                        )
+                        end_char = offsets[end_token]
+                        break
+
+            chunk = text[start_char:end_char]
+            if self._strip_whitespace:
+                chunk = chunk.strip()
+            if chunk:
+                chunks.append(chunk)
+            if end_token >= token_count:
+                break
+
+            # Start the next chunk chunk_overlap tokens before the end, at a word boundary
+            next_start_token = max(end_token - self._chunk_overlap, start_token + 1)
+            if next_start_token < end_token:
+                position = text.find(" ", offsets[next_start_token], end_char)
+                if position != -1:
+                    next_start_token = max(
+                        bisect_left(offsets, position, next_start_token), next_start_token
+                    )
+            start_token = next_start_token
+        return chunks